@@ -16,19 +16,48 @@ import asyncio
 import atexit
 import logging
 import os
+import queue
+import re
+import signal
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
+try:
+    import uvloop  # Optional: faster libuv-based event loop
+except ImportError:
+    uvloop = None
+
 
 # =============================================================================
 # PID Lock File - Prevent duplicate bot instances
 # =============================================================================
-def _get_lock_file_path() -> Path:
-    """Get the lock file path in the bot directory."""
-    return Path(__file__).parent / ".bot.pid"
+_LOCK_FILE = Path(__file__).parent / ".bot.pid"
+_LOCK_FILE_STR = str(_LOCK_FILE)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with the given PID is running."""
+    if hasattr(os, "pidfd_open"):
+        # Linux 5.3+: race-free liveness check
+        try:
+            os.close(os.pidfd_open(pid))
+            return True
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass  # Kernel without pidfd support - fall back to signal 0
+    try:
+        os.kill(pid, 0)  # Signal 0 = check if process exists
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Process exists but belongs to another user
 
 
 def acquire_lock() -> bool:
@@ -36,38 +65,46 @@ def acquire_lock() -> bool:
     Acquire exclusive lock by creating a PID file.
     Returns True if lock acquired, False if another instance is running.
     """
-    lock_file = _get_lock_file_path()
+    for _ in range(2):
+        try:
+            # Atomic create-or-fail: only one instance can win
+            fd = os.open(_LOCK_FILE_STR, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try:
+                old_pid = int(_LOCK_FILE.read_text().strip())
+                if _pid_alive(old_pid):
+                    # Process exists - another instance is running
+                    return False
+            except (ValueError, FileNotFoundError):
+                # PID invalid - stale lock file
+                pass
+            # Stale lock file - remove and retry once
+            try:
+                os.unlink(_LOCK_FILE_STR)
+            except FileNotFoundError:
+                pass
+            continue
 
-    # Check if lock file exists
-    if lock_file.exists():
         try:
-            old_pid = int(lock_file.read_text().strip())
-            # Check if process is still running
-            os.kill(old_pid, 0)  # Signal 0 = check if process exists
-            # Process exists - another instance is running
-            return False
-        except (ValueError, ProcessLookupError, PermissionError):
-            # PID invalid or process not running - stale lock file
-            pass
+            os.write(fd, str(os.getpid()).encode())
+        finally:
+            os.close(fd)
+        return True
 
-    # Write our PID to lock file
-    lock_file.write_text(str(os.getpid()))
-    return True
+    return False
 
 
 def release_lock() -> None:
     """Release the lock by removing the PID file."""
-    lock_file = _get_lock_file_path()
     try:
-        if lock_file.exists():
-            # Only remove if it's our PID
-            current_pid = lock_file.read_text().strip()
-            if current_pid == str(os.getpid()):
-                lock_file.unlink()
+        # Only remove if it's our PID
+        current_pid = _LOCK_FILE.read_text().strip()
+        if current_pid == str(os.getpid()):
+            os.unlink(_LOCK_FILE_STR)
     except Exception:
         pass  # Best effort cleanup
-from telegram import Update
-from telegram.ext import Application
+from telegram import BotCommandScopeAllGroupChats, BotCommandScopeAllPrivateChats, Update
+from telegram.ext import AIORateLimiter, Application
 
 # Load environment variables
 load_dotenv()
@@ -76,90 +113,137 @@ load_dotenv()
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = os.getenv("LOG_FILE")
 
+_log_handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+_log_listener: Optional[QueueListener] = None
+if LOG_FILE:
+    # File writes happen on the listener thread, off the event loop.
+    # WatchedFileHandler reopens the file after external log rotation.
+    _log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue, WatchedFileHandler(LOG_FILE, delay=True))
+    _log_handlers.append(QueueHandler(_log_queue))
+
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        *(
-            [logging.FileHandler(LOG_FILE)]
-            if LOG_FILE
-            else []
-        ),
-    ],
+    handlers=_log_handlers,
 )
+# Skip LogRecord fields the format string never uses
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
+# Startup banner, logged as a single record
+_BANNER = "\n%s\nTeleTask Bot Starting...\n%s" % ("=" * 60, "=" * 60)
+
+# Admin/group IDs in ADMIN_IDS (group IDs are negative)
+_ADMIN_ID_RE = re.compile(r"-?\d+")
+
+
+# Commands for private chat (no giaoviec, viecdagiao)
+# Quick actions prioritized at top for easy access
+_PRIVATE_COMMANDS: tuple[tuple[str, str], ...] = (
+    ("menu", "📋 Menu thao tác nhanh"),
+    ("taoviec", "➕ Tạo việc mới"),
+    ("xemviec", "👁️ Xem việc"),
+    ("xoa", "🗑️ Xóa việc"),
+    ("thongke", "📊 Thống kê"),
+    ("start", "Bắt đầu sử dụng bot"),
+    ("help", "Xem hướng dẫn sử dụng"),
+    ("vieccanhan", "Xem danh sách việc cá nhân"),
+    ("xong", "Đánh dấu việc hoàn thành"),
+    ("tiendo", "Cập nhật tiến độ việc"),
+    ("timviec", "Tìm kiếm việc"),
+    ("nhacviec", "Đặt nhắc việc tự động"),
+    ("vieclaplai", "Tạo việc lặp lại tự động"),
+    ("danhsachvieclaplai", "Xem danh sách việc lặp lại"),
+    ("thongketuan", "Xem thống kê tuần này"),
+    ("thongkethang", "Xem thống kê tháng này"),
+    ("viectrehan", "Xem việc trễ hạn"),
+    ("export", "Xuất báo cáo thống kê"),
+    ("thongtin", "Xem thông tin tài khoản"),
+    ("lichgoogle", "Kết nối Google Calendar"),
+    ("caidat", "Cài đặt thông báo và múi giờ"),
+)
+
+# Commands for group chat (includes giaoviec, viecdagiao)
+# Quick actions prioritized at top for easy access
+_GROUP_COMMANDS: tuple[tuple[str, str], ...] = (
+    ("menu", "📋 Menu thao tác nhanh"),
+    ("taoviec", "➕ Tạo việc mới"),
+    ("giaoviec", "👥 Giao việc cho người khác"),
+    ("xemviec", "👁️ Xem việc"),
+    ("xoa", "🗑️ Xóa việc"),
+    ("thongke", "📊 Thống kê"),
+    ("start", "Bắt đầu sử dụng bot"),
+    ("help", "Xem hướng dẫn sử dụng"),
+    ("vieccanhan", "Xem danh sách việc cá nhân"),
+    ("viecdagiao", "Xem việc bạn đã giao"),
+    ("xong", "Đánh dấu việc hoàn thành"),
+    ("tiendo", "Cập nhật tiến độ việc"),
+    ("timviec", "Tìm kiếm việc"),
+    ("nhacviec", "Đặt nhắc việc tự động"),
+    ("vieclaplai", "Tạo việc lặp lại tự động"),
+    ("danhsachvieclaplai", "Xem danh sách việc lặp lại"),
+    ("thongketuan", "Xem thống kê tuần này"),
+    ("thongkethang", "Xem thống kê tháng này"),
+    ("viectrehan", "Xem việc trễ hạn"),
+    ("export", "Xuất báo cáo thống kê"),
+    ("thongtin", "Xem thông tin tài khoản"),
+    ("lichgoogle", "Kết nối Google Calendar"),
+    ("caidat", "Cài đặt thông báo và múi giờ"),
+)
+
 
 async def post_init(application: Application) -> None:
     """Post-initialization hook to set bot commands."""
-    from telegram import BotCommandScopeAllPrivateChats, BotCommandScopeAllGroupChats
-
-    # Commands for private chat (no giaoviec, viecdagiao)
-    # Quick actions prioritized at top for easy access
-    private_commands = [
-        ("menu", "📋 Menu thao tác nhanh"),
-        ("taoviec", "➕ Tạo việc mới"),
-        ("xemviec", "👁️ Xem việc"),
-        ("xoa", "🗑️ Xóa việc"),
-        ("thongke", "📊 Thống kê"),
-        ("start", "Bắt đầu sử dụng bot"),
-        ("help", "Xem hướng dẫn sử dụng"),
-        ("vieccanhan", "Xem danh sách việc cá nhân"),
-        ("xong", "Đánh dấu việc hoàn thành"),
-        ("tiendo", "Cập nhật tiến độ việc"),
-        ("timviec", "Tìm kiếm việc"),
-        ("nhacviec", "Đặt nhắc việc tự động"),
-        ("vieclaplai", "Tạo việc lặp lại tự động"),
-        ("danhsachvieclaplai", "Xem danh sách việc lặp lại"),
-        ("thongketuan", "Xem thống kê tuần này"),
-        ("thongkethang", "Xem thống kê tháng này"),
-        ("viectrehan", "Xem việc trễ hạn"),
-        ("export", "Xuất báo cáo thống kê"),
-        ("thongtin", "Xem thông tin tài khoản"),
-        ("lichgoogle", "Kết nối Google Calendar"),
-        ("caidat", "Cài đặt thông báo và múi giờ"),
-    ]
-
-    # Commands for group chat (includes giaoviec, viecdagiao)
-    # Quick actions prioritized at top for easy access
-    group_commands = [
-        ("menu", "📋 Menu thao tác nhanh"),
-        ("taoviec", "➕ Tạo việc mới"),
-        ("giaoviec", "👥 Giao việc cho người khác"),
-        ("xemviec", "👁️ Xem việc"),
-        ("xoa", "🗑️ Xóa việc"),
-        ("thongke", "📊 Thống kê"),
-        ("start", "Bắt đầu sử dụng bot"),
-        ("help", "Xem hướng dẫn sử dụng"),
-        ("vieccanhan", "Xem danh sách việc cá nhân"),
-        ("viecdagiao", "Xem việc bạn đã giao"),
-        ("xong", "Đánh dấu việc hoàn thành"),
-        ("tiendo", "Cập nhật tiến độ việc"),
-        ("timviec", "Tìm kiếm việc"),
-        ("nhacviec", "Đặt nhắc việc tự động"),
-        ("vieclaplai", "Tạo việc lặp lại tự động"),
-        ("danhsachvieclaplai", "Xem danh sách việc lặp lại"),
-        ("thongketuan", "Xem thống kê tuần này"),
-        ("thongkethang", "Xem thống kê tháng này"),
-        ("viectrehan", "Xem việc trễ hạn"),
-        ("export", "Xuất báo cáo thống kê"),
-        ("thongtin", "Xem thông tin tài khoản"),
-        ("lichgoogle", "Kết nối Google Calendar"),
-        ("caidat", "Cài đặt thông báo và múi giờ"),
-    ]
-
-    # Set different commands for private and group chats
-    await application.bot.set_my_commands(private_commands, scope=BotCommandScopeAllPrivateChats())
-    await application.bot.set_my_commands(group_commands, scope=BotCommandScopeAllGroupChats())
+    # Set different commands for private and group chats (independent requests)
+    await asyncio.gather(
+        application.bot.set_my_commands(_PRIVATE_COMMANDS, scope=BotCommandScopeAllPrivateChats()),
+        application.bot.set_my_commands(_GROUP_COMMANDS, scope=BotCommandScopeAllGroupChats()),
+    )
     logger.info("Bot commands registered (private + group)")
 
 
+def _set_stop(stop: asyncio.Future) -> None:
+    """Resolve the stop future (signal handler)."""
+    if not stop.done():
+        stop.set_result(None)
+
+
+async def _start_health_server(application: Application, db, admin_ids: list[int]):
+    """Start health check server if monitoring is enabled. Returns server or None."""
+    if not admin_ids:
+        return None
+    try:
+        from monitoring import HealthCheckServer
+
+        health_port = int(os.getenv('HEALTH_PORT', 8080))
+        health_server = HealthCheckServer(application, db, port=health_port)
+        await health_server.start()
+        return health_server
+    except ImportError as e:
+        logger.warning("Health check server not available: %s", e)
+    except Exception as e:
+        logger.error("Failed to start health check server: %s", e)
+    return None
+
+
+async def _start_oauth_server():
+    """Start OAuth callback server (for Google Calendar). Returns runner or None."""
+    if os.getenv("GOOGLE_CALENDAR_ENABLED", "false").lower() != "true":
+        return None
+    try:
+        from services.oauth_callback import start_oauth_server
+        return await start_oauth_server()
+    except Exception as e:
+        logger.warning("OAuth callback server not started: %s", e)
+    return None
+
+
 async def main() -> None:
     """Main entry point for the bot."""
-    logger.info("=" * 60)
-    logger.info("TeleTask Bot Starting...")
-    logger.info("=" * 60)
+    logger.info(_BANNER)
 
     # Validate required environment variables
     bot_token = os.getenv("BOT_TOKEN")
@@ -172,23 +256,19 @@ async def main() -> None:
         logger.error("DATABASE_URL environment variable is required")
         sys.exit(1)
 
-    logger.info(f"Bot Name: {os.getenv('BOT_NAME', 'TeleTask')}")
-    logger.info(f"Timezone: {os.getenv('TZ', 'UTC')}")
-    logger.info(f"Log Level: {LOG_LEVEL}")
-
-    # Initialize database connection
-    from database.connection import init_database, close_database
-    logger.info("Connecting to database...")
-    await init_database(database_url)
-    logger.info("Database connected")
+    logger.info("Bot Name: %s", os.getenv('BOT_NAME', 'TeleTask'))
+    logger.info("Timezone: %s", os.getenv('TZ', 'UTC'))
+    logger.info("Log Level: %s", LOG_LEVEL)
 
     # Build application
-    application = (
-        Application.builder()
-        .token(bot_token)
-        .post_init(post_init)
-        .build()
-    )
+    builder = Application.builder().token(bot_token).post_init(post_init)
+    # Throttle all outbound requests to Telegram's global and per-group
+    # limits; on RetryAfter every sender pauses instead of hammering the API
+    try:
+        builder = builder.rate_limiter(AIORateLimiter(max_retries=3))
+    except RuntimeError as e:  # aiolimiter (rate-limiter extra) not installed
+        logger.warning("Outbound rate limiter disabled: %s", e)
+    application = builder.build()
 
     # Register handlers
     from handlers import register_handlers
@@ -196,10 +276,32 @@ async def main() -> None:
     application.add_error_handler(error_handler)
     logger.info("Handlers registered")
 
-    # Initialize reminder scheduler
     from database import get_db
-    from scheduler import init_scheduler, reminder_scheduler, init_report_scheduler
+    from database.connection import init_database, close_database
     db = get_db()
+    start_time = datetime.now()
+
+    admin_ids_str = os.getenv('ADMIN_IDS', '')
+    # Support both personal IDs (positive) and group IDs (negative)
+    admin_ids = [int(m) for m in _ADMIN_ID_RE.findall(admin_ids_str)]
+
+    # Independent network I/O runs concurrently: DB pool, Telegram getMe
+    # (application.initialize), health + OAuth servers
+    logger.info("Connecting to database...")
+    _, _, health_server, oauth_runner = await asyncio.gather(
+        init_database(database_url),
+        application.initialize(),
+        _start_health_server(application, db, admin_ids),
+        _start_oauth_server(),
+    )
+    logger.info("Database connected")
+
+    # Cache users rows in-process, invalidated by NOTIFY user_changed
+    from services import enable_user_cache
+    await enable_user_cache(db)
+
+    # Initialize reminder scheduler
+    from scheduler import init_scheduler, reminder_scheduler, init_report_scheduler
     init_scheduler(application.bot, db)
     logger.info("Reminder scheduler started")
 
@@ -208,31 +310,16 @@ async def main() -> None:
     logger.info("Report scheduler started")
 
     # Initialize monitoring (optional - only if admin IDs configured)
-    health_server = None
     alert_service = None
     resource_monitor = None
-    start_time = datetime.now()
-
-    admin_ids_str = os.getenv('ADMIN_IDS', '')
-    # Support both personal IDs (positive) and group IDs (negative)
-    admin_ids = []
-    for x in admin_ids_str.split(','):
-        x = x.strip()
-        if x.lstrip('-').isdigit() and x:
-            admin_ids.append(int(x))
 
     if admin_ids:
         try:
-            from monitoring import HealthCheckServer, AlertService, ResourceMonitor
+            from monitoring import AlertService, ResourceMonitor
 
             # Initialize alert service
             alert_service = AlertService(application.bot, admin_ids)
 
-            # Start health check server
-            health_port = int(os.getenv('HEALTH_PORT', 8080))
-            health_server = HealthCheckServer(application, db, port=health_port)
-            await health_server.start()
-
             # Start resource monitor
             resource_monitor = ResourceMonitor(db, alert_service, start_time)
             await resource_monitor.start()
@@ -243,29 +330,20 @@ async def main() -> None:
             # Send startup alert
             await alert_service.alert_bot_start()
 
-            logger.info(f"Monitoring started (health port: {health_port}, admins: {len(admin_ids)})")
+            health_port = health_server.port if health_server else None
+            logger.info("Monitoring started (health port: %s, admins: %d)", health_port, len(admin_ids))
         except ImportError as e:
-            logger.warning(f"Monitoring not available: {e}")
+            logger.warning("Monitoring not available: %s", e)
         except Exception as e:
-            logger.error(f"Failed to start monitoring: {e}")
+            logger.error("Failed to start monitoring: %s", e)
     else:
         logger.info("Monitoring disabled (no ADMIN_IDS configured)")
 
-    # Start OAuth callback server (for Google Calendar)
-    oauth_runner = None
-    if os.getenv("GOOGLE_CALENDAR_ENABLED", "false").lower() == "true":
-        try:
-            from services.oauth_callback import start_oauth_server
-            oauth_runner = await start_oauth_server()
-        except Exception as e:
-            logger.warning(f"OAuth callback server not started: {e}")
-
     logger.info("Bot initialization complete")
     logger.info("Starting polling...")
 
     try:
-        # Start polling
-        await application.initialize()
+        # Start polling (application already initialized above)
         await application.start()
         await application.updater.start_polling(
             allowed_updates=Update.ALL_TYPES,
@@ -274,9 +352,16 @@ async def main() -> None:
 
         logger.info("Bot is running. Press Ctrl+C to stop.")
 
-        # Keep running until interrupted
-        stop_event = asyncio.Event()
-        await stop_event.wait()
+        # Keep running until SIGINT/SIGTERM
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, _set_stop, stop)
+            except NotImplementedError:
+                pass  # Windows: rely on KeyboardInterrupt
+        await stop
+        logger.info("Bot stopping...")
 
     except asyncio.CancelledError:
         logger.info("Bot stopping...")
@@ -297,6 +382,8 @@ async def main() -> None:
 
         from scheduler import stop_scheduler
         stop_scheduler()
+        from handlers.callbacks import close_rate_limiter
+        await close_rate_limiter()
         await application.updater.stop()
         await application.stop()
         await application.shutdown()
@@ -307,7 +394,7 @@ async def main() -> None:
 async def error_handler(update, context):
     """Global error handler with monitoring integration."""
     error = context.error
-    logger.error(f"Error handling update: {error}", exc_info=error)
+    logger.error("Error handling update: %s", error, exc_info=error)
 
     # Record error metric
     try:
@@ -322,7 +409,7 @@ async def error_handler(update, context):
         try:
             await alert_service.alert_bot_crash(error)
         except Exception as e:
-            logger.warning(f"Failed to send error alert: {e}")
+            logger.warning("Failed to send error alert: %s", e)
 
 
 if __name__ == "__main__":
@@ -335,12 +422,21 @@ if __name__ == "__main__":
     # Register cleanup on exit
     atexit.register(release_lock)
 
+    # Use uvloop when available (not supported on Windows)
+    if uvloop is not None and sys.platform != "win32":
+        uvloop.install()
+
+    if _log_listener:
+        _log_listener.start()
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.exception(f"Bot crashed: {e}")
+        logger.exception("Bot crashed: %s", e)
         sys.exit(1)
     finally:
+        if _log_listener:
+            _log_listener.stop()
         release_lock()
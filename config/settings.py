@@ -12,6 +12,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Default DB pool size: 2 x CPU cores + 4
+_DEFAULT_POOL_SIZE = (os.cpu_count() or 1) * 2 + 4
+
 
 @dataclass
 class Settings:
@@ -26,10 +29,10 @@ class Settings:
         default_factory=lambda: os.getenv("DATABASE_URL", "")
     )
     db_pool_min: int = field(
-        default_factory=lambda: int(os.getenv("DB_POOL_MIN", "2"))
+        default_factory=lambda: int(os.getenv("DB_POOL_MIN") or _DEFAULT_POOL_SIZE)
     )
     db_pool_max: int = field(
-        default_factory=lambda: int(os.getenv("DB_POOL_MAX", "10"))
+        default_factory=lambda: int(os.getenv("DB_POOL_MAX") or _DEFAULT_POOL_SIZE)
     )
 
     # Timezone
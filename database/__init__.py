@@ -14,7 +14,7 @@ Tables:
 - bot_config: Key-value settings
 """
 
-from .connection import Database, db, init_database, close_database, get_db
+from .connection import Database, db, init_database, close_database, get_db, count_queries
 from .models import (
     Base,
     User,
@@ -35,6 +35,7 @@ __all__ = [
     "init_database",
     "close_database",
     "get_db",
+    "count_queries",
     # Models
     "Base",
     "User",
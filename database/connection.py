@@ -5,15 +5,80 @@ Async PostgreSQL connection pooling with asyncpg
 
 import asyncio
 import logging
-from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Optional
+import os
+import re
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Iterator, Optional
 
 import asyncpg
+import orjson
 from asyncpg import Pool, Connection, Record
+from asyncpg.prepared_stmt import PreparedStatement
 
 logger = logging.getLogger(__name__)
 
 
+def _json_encode(value: Any) -> str:
+    """Encode Python value to JSON text for json/jsonb parameters."""
+    return orjson.dumps(value, default=str).decode()
+
+
+# Default pool size: enough for concurrent handlers plus scheduler jobs
+DEFAULT_POOL_SIZE = (os.cpu_count() or 1) * 2 + 4
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read integer env var, falling back to default when unset or empty."""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# Batches larger than this use COPY instead of a multi-row INSERT
+COPY_THRESHOLD = 500
+
+# Seconds a health check may take (connect or query) before it counts as
+# unhealthy; keeps a half-open socket from hanging the monitor tick
+HEALTH_CHECK_TIMEOUT = 5.0
+
+# Positional parameters ($1, $2, ...) in a query
+_PARAM_RE = re.compile(r"\$(\d+)")
+
+# Queries issued by the current task while count_queries() is active
+_query_log: ContextVar[Optional[list[str]]] = ContextVar("query_log", default=None)
+
+
+def _record_query(query: str) -> None:
+    """Append query to the active count_queries() log, if any."""
+    log = _query_log.get()
+    if log is not None:
+        log.append(query)
+
+
+@contextmanager
+def count_queries() -> Iterator[list[str]]:
+    """
+    Record the queries Database runs inside the block, to catch N+1 loops.
+
+    Usage:
+        with count_queries() as queries:
+            await handler(update, context)
+        if len(queries) > budget:
+            logger.warning(...)
+
+    Statements run directly on a connection from acquire() or
+    transaction() are not counted; fetch_one_on/fetch_all_on are.
+
+    Yields:
+        List that collects the query text of each statement
+    """
+    token = _query_log.set([])
+    try:
+        yield _query_log.get()
+    finally:
+        _query_log.reset(token)
+
+
 class Database:
     """
     Async PostgreSQL database connection manager.
@@ -23,30 +88,52 @@ class Database:
     def __init__(self):
         self.pool: Optional[Pool] = None
         self._dsn: Optional[str] = None
+        self._long_timeout: float = 60.0
+        # Dedicated connection + prepared "SELECT 1" for health checks
+        self._health_conn: Optional[Connection] = None
+        self._health_stmt: Optional[PreparedStatement] = None
+        # Hot queries prepared on every new pool connection
+        self._prepared: dict[str, str] = {}
+        # Dedicated connection for LISTEN (pool connections get recycled)
+        self._listen_conn: Optional[Connection] = None
 
     async def connect(
         self,
         dsn: str,
-        min_size: int = 2,
-        max_size: int = 10,
-        timeout: float = 60.0,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        timeout: float = 5.0,
+        long_command_timeout: float = 60.0,
         timezone: str = "Asia/Ho_Chi_Minh",
+        statement_cache_size: int = 1024,
+        max_cacheable_statement_size: int = 1024 * 64,
+        max_cached_statement_lifetime: int = 0,
     ) -> None:
         """
         Initialize connection pool.
 
         Args:
             dsn: PostgreSQL connection string
-            min_size: Minimum pool connections
-            max_size: Maximum pool connections
-            timeout: Command timeout in seconds
+            min_size: Minimum pool connections (default: DB_POOL_MIN env)
+            max_size: Maximum pool connections (default: DB_POOL_MAX env)
+            timeout: Command timeout in seconds (handler queries)
+            long_command_timeout: Timeout for fetch_long (exports/reports)
             timezone: Database timezone
+            statement_cache_size: Prepared statements cached per connection
+            max_cacheable_statement_size: Max query length (bytes) to cache
+            max_cached_statement_lifetime: Seconds before a cached statement
+                is re-prepared (0 = keep while the connection lives)
         """
         if self.pool is not None:
             logger.warning("Pool already exists, closing existing pool")
             await self.close()
 
         self._dsn = dsn
+        self._long_timeout = long_command_timeout
+        if min_size is None:
+            min_size = _env_int("DB_POOL_MIN", DEFAULT_POOL_SIZE)
+        if max_size is None:
+            max_size = max(_env_int("DB_POOL_MAX", DEFAULT_POOL_SIZE), min_size)
 
         try:
             self.pool = await asyncpg.create_pool(
@@ -54,20 +141,81 @@ class Database:
                 min_size=min_size,
                 max_size=max_size,
                 command_timeout=timeout,
-                server_settings={"timezone": timezone},
+                max_inactive_connection_lifetime=300.0,
+                statement_cache_size=statement_cache_size,
+                max_cacheable_statement_size=max_cacheable_statement_size,
+                max_cached_statement_lifetime=max_cached_statement_lifetime,
+                server_settings={
+                    "timezone": timezone,
+                    # JIT only adds startup cost to short OLTP queries
+                    "jit": "off",
+                    "application_name": "teletask-bot",
+                    # Server-side TCP keepalives so NAT/firewalls keep idle
+                    # pool connections open
+                    "tcp_keepalives_idle": "60",
+                    "tcp_keepalives_interval": "10",
+                    "tcp_keepalives_count": "3",
+                },
+                init=self._init_connection,
             )
-            logger.info(f"Database pool created (min={min_size}, max={max_size})")
+            logger.info("Database pool created (min=%d, max=%d)", min_size, max_size)
         except Exception as e:
-            logger.error(f"Failed to create database pool: {e}")
+            logger.error("Failed to create database pool: %s", e)
             raise
 
     async def close(self) -> None:
         """Close connection pool."""
+        await self._close_health_conn()
+        await self._close_listen_conn()
         if self.pool:
             await self.pool.close()
             self.pool = None
             logger.info("Database pool closed")
 
+    async def _init_connection(self, conn: Connection) -> None:
+        """
+        Set up a newly opened connection.
+
+        Registers orjson codecs so json/jsonb values are exchanged as
+        Python objects, then loads registered hot queries into the
+        connection's statement cache.
+        """
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(
+                type_name,
+                encoder=_json_encode,
+                decoder=orjson.loads,
+                schema="pg_catalog",
+            )
+        # conn.prepare() bypasses the statement cache, so run each query
+        # once with NULL params instead; later fetches with the same text
+        # then skip parse/plan
+        for name, query in self._prepared.items():
+            param_count = max((int(n) for n in _PARAM_RE.findall(query)), default=0)
+            try:
+                await conn.fetch(query, *([None] * param_count))
+            except asyncpg.PostgresError as e:
+                # Not fatal: the statement is cached on first real use
+                logger.warning("Could not pre-cache query %s: %s", name, e)
+
+    def register_prepared(self, name: str, query: str) -> None:
+        """
+        Register a hot query to be cached on every new pool connection.
+
+        Call before connect(). The query is run once with all parameters
+        NULL on each new connection, so only SELECTs are accepted.
+
+        Args:
+            name: Unique name for the query
+            query: SQL query, byte-identical to the text used at call sites
+
+        Raises:
+            ValueError: If query is not a SELECT
+        """
+        if not query.lstrip().upper().startswith("SELECT"):
+            raise ValueError(f"Only SELECT queries can be registered: {name}")
+        self._prepared[name] = query
+
     async def _ensure_pool(self) -> Pool:
         """Ensure pool exists."""
         if self.pool is None:
@@ -88,8 +236,8 @@ class Database:
             Record or None
         """
         pool = await self._ensure_pool()
-        async with pool.acquire() as conn:
-            return await conn.fetchrow(query, *args)
+        _record_query(query)
+        return await pool.fetchrow(query, *args)
 
     async def fetch_all(self, query: str, *args: Any) -> list[Record]:
         """
@@ -103,8 +251,8 @@ class Database:
             List of records
         """
         pool = await self._ensure_pool()
-        async with pool.acquire() as conn:
-            return await conn.fetch(query, *args)
+        _record_query(query)
+        return await pool.fetch(query, *args)
 
     async def fetch_val(self, query: str, *args: Any) -> Any:
         """
@@ -118,8 +266,71 @@ class Database:
             Single value or None
         """
         pool = await self._ensure_pool()
+        _record_query(query)
+        return await pool.fetchval(query, *args)
+
+    async def fetch_long(self, query: str, *args: Any) -> list[Record]:
+        """
+        Fetch all rows with the long command timeout.
+
+        Use for heavy queries (exports, reports) that may exceed the
+        default per-query timeout.
+
+        Args:
+            query: SQL query
+            *args: Query parameters
+
+        Returns:
+            List of records
+        """
+        pool = await self._ensure_pool()
+        _record_query(query)
         async with pool.acquire() as conn:
-            return await conn.fetchval(query, *args)
+            return await conn.fetch(query, *args, timeout=self._long_timeout)
+
+    async def fetch_json(self, query: str, *args: Any) -> bytes:
+        """
+        Fetch all rows serialized as a JSON array.
+
+        Serialization runs server-side via json_agg, so no per-row
+        Record/dict objects are built in Python.
+
+        Args:
+            query: SQL query (wrapped as a subquery)
+            *args: Query parameters
+
+        Returns:
+            UTF-8 encoded JSON array (b"[]" when no rows)
+        """
+        pool = await self._ensure_pool()
+        _record_query(query)
+        result = await pool.fetchval(
+            f"SELECT COALESCE(json_agg(t), '[]'::json)::text FROM ({query}) t",
+            *args,
+        )
+        return result.encode()
+
+    async def gather_queries(
+        self, queries: list[tuple[str, tuple]]
+    ) -> list[list[Record]]:
+        """
+        Run independent queries concurrently on separate pool connections.
+
+        Args:
+            queries: List of (query, args) pairs
+
+        Returns:
+            List of row lists, in the same order as queries
+        """
+        pool = await self._ensure_pool()
+        for query, _ in queries:
+            _record_query(query)
+
+        async def run(query: str, args: tuple) -> list[Record]:
+            async with pool.acquire() as conn:
+                return await conn.fetch(query, *args)
+
+        return await asyncio.gather(*(run(q, a) for q, a in queries))
 
     async def execute(self, query: str, *args: Any) -> str:
         """
@@ -133,8 +344,8 @@ class Database:
             Status string (e.g., 'INSERT 0 1')
         """
         pool = await self._ensure_pool()
-        async with pool.acquire() as conn:
-            return await conn.execute(query, *args)
+        _record_query(query)
+        return await pool.execute(query, *args)
 
     async def execute_many(self, query: str, args_list: list[tuple]) -> None:
         """
@@ -145,9 +356,97 @@ class Database:
             args_list: List of parameter tuples
         """
         pool = await self._ensure_pool()
+        _record_query(query)
         async with pool.acquire() as conn:
             await conn.executemany(query, args_list)
 
+    async def copy_records(
+        self, table: str, records: list[tuple], columns: list[str]
+    ) -> str:
+        """
+        Bulk load rows using the COPY protocol.
+
+        Args:
+            table: Target table name
+            records: List of row tuples
+            columns: Column names matching tuple order
+
+        Returns:
+            Status string (e.g., 'COPY 1000')
+        """
+        pool = await self._ensure_pool()
+        _record_query(f"COPY {table}")
+        async with pool.acquire() as conn:
+            return await conn.copy_records_to_table(
+                table, records=records, columns=columns
+            )
+
+    async def insert_many(
+        self, table: str, columns: list[str], rows: list[tuple]
+    ) -> None:
+        """
+        Insert many rows in a single multi-row INSERT statement.
+
+        Uses COPY for large batches. Table and column names must be
+        trusted identifiers (never user input).
+
+        Args:
+            table: Target table name
+            columns: Column names matching tuple order
+            rows: List of row tuples
+        """
+        if not rows:
+            return
+        if len(rows) > COPY_THRESHOLD:
+            await self.copy_records(table, rows, columns)
+            return
+
+        width = len(columns)
+        placeholders = ", ".join(
+            "(" + ", ".join(f"${i * width + j + 1}" for j in range(width)) + ")"
+            for i in range(len(rows))
+        )
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders}"
+        args = [value for row in rows for value in row]
+        await self.execute(query, *args)
+
+    # Connection reuse
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncGenerator[Connection, None]:
+        """
+        Acquire one pooled connection for several sequential queries.
+
+        Usage:
+            async with db.acquire() as conn:
+                user = await db.fetch_one_on(conn, "SELECT ...", user_id)
+                tasks = await db.fetch_all_on(conn, "SELECT ...", user_id)
+
+        Yields:
+            Pooled connection (released on exit)
+        """
+        pool = await self._ensure_pool()
+        async with pool.acquire() as conn:
+            yield conn
+
+    async def fetch_one_on(
+        self, conn: Optional[Connection], query: str, *args: Any
+    ) -> Optional[Record]:
+        """Fetch single row on an already acquired connection (pool if None)."""
+        if conn is None:
+            return await self.fetch_one(query, *args)
+        _record_query(query)
+        return await conn.fetchrow(query, *args)
+
+    async def fetch_all_on(
+        self, conn: Optional[Connection], query: str, *args: Any
+    ) -> list[Record]:
+        """Fetch all rows on an already acquired connection (pool if None)."""
+        if conn is None:
+            return await self.fetch_all(query, *args)
+        _record_query(query)
+        return await conn.fetch(query, *args)
+
     # Transaction support
 
     @asynccontextmanager
@@ -178,13 +477,77 @@ class Database:
         Returns:
             True if healthy, False otherwise
         """
+        if self.pool is None or self.pool.is_closing():
+            return False
         try:
-            result = await self.fetch_val("SELECT 1")
-            return result == 1
+            if self._health_stmt is None:
+                self._health_conn = await asyncpg.connect(
+                    self._dsn,
+                    timeout=HEALTH_CHECK_TIMEOUT,
+                    command_timeout=HEALTH_CHECK_TIMEOUT,
+                    server_settings={"application_name": "teletask-health"},
+                )
+                self._health_stmt = await self._health_conn.prepare("SELECT 1")
+            # A timeout raises and is handled below (unhealthy, reconnect next time)
+            return await self._health_stmt.fetchval(timeout=HEALTH_CHECK_TIMEOUT) == 1
         except Exception as e:
-            logger.error(f"Database health check failed: {e}")
+            logger.error("Database health check failed: %s", e)
+            await self._close_health_conn()
             return False
 
+    async def _close_health_conn(self) -> None:
+        """Close the dedicated health check connection."""
+        conn = self._health_conn
+        self._health_conn = None
+        self._health_stmt = None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception:
+                pass  # Best effort cleanup
+
+    # LISTEN/NOTIFY
+
+    async def listen(
+        self,
+        channel: str,
+        callback: Callable[[str], None],
+        on_disconnect: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Subscribe to NOTIFY messages on a channel.
+
+        Uses one dedicated connection for all channels. If that connection
+        drops, notifications stop; on_disconnect lets the caller stop
+        trusting anything that relied on them.
+
+        Args:
+            channel: Channel name
+            callback: Called with the notification payload
+            on_disconnect: Called once if the listen connection is lost
+        """
+        if self._listen_conn is None or self._listen_conn.is_closed():
+            self._listen_conn = await asyncpg.connect(
+                self._dsn,
+                server_settings={"application_name": "teletask-listen"},
+            )
+        await self._listen_conn.add_listener(
+            channel, lambda _conn, _pid, _channel, payload: callback(payload)
+        )
+        if on_disconnect is not None:
+            self._listen_conn.add_termination_listener(lambda _conn: on_disconnect())
+        logger.info("Listening on channel %s", channel)
+
+    async def _close_listen_conn(self) -> None:
+        """Close the dedicated LISTEN connection."""
+        conn = self._listen_conn
+        self._listen_conn = None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close()
+            except Exception:
+                pass  # Best effort cleanup
+
     @property
     def is_connected(self) -> bool:
         """Check if pool exists."""
@@ -207,6 +570,8 @@ async def init_database(dsn: str, **kwargs) -> Database:
         Database instance
     """
     await db.connect(dsn, **kwargs)
+    # Warm up the pool so it is ready before handlers run
+    await db.fetch_val("SELECT 1")
     return db
 
 
@@ -220,18 +220,27 @@ def upgrade() -> None:
         sa.UniqueConstraint("key"),
     )
 
-    # Insert default config
-    op.execute("""
-        INSERT INTO bot_config (key, value, description) VALUES
-        ('bot_name', 'Task Manager Bot', 'Ten hien thi'),
-        ('bot_description', 'He thong quan ly va nhac viec', 'Mo ta bot'),
-        ('support_telegram', '@support', 'Telegram ho tro'),
-        ('support_phone', '', 'SDT ho tro'),
-        ('support_email', '', 'Email ho tro'),
-        ('admin_telegram_id', '', 'Admin ID nhan alert'),
-        ('timezone', 'Asia/Ho_Chi_Minh', 'Timezone mac dinh'),
-        ('task_id_counter', '0', 'Counter cho task ID');
-    """)
+    # Insert default config (single multi-row INSERT)
+    bot_config = sa.table(
+        "bot_config",
+        sa.column("key", sa.String),
+        sa.column("value", sa.Text),
+        sa.column("description", sa.Text),
+    )
+    op.bulk_insert(
+        bot_config,
+        [
+            {"key": "bot_name", "value": "Task Manager Bot", "description": "Ten hien thi"},
+            {"key": "bot_description", "value": "He thong quan ly va nhac viec", "description": "Mo ta bot"},
+            {"key": "support_telegram", "value": "@support", "description": "Telegram ho tro"},
+            {"key": "support_phone", "value": "", "description": "SDT ho tro"},
+            {"key": "support_email", "value": "", "description": "Email ho tro"},
+            {"key": "admin_telegram_id", "value": "", "description": "Admin ID nhan alert"},
+            {"key": "timezone", "value": "Asia/Ho_Chi_Minh", "description": "Timezone mac dinh"},
+            {"key": "task_id_counter", "value": "0", "description": "Counter cho task ID"},
+        ],
+        multiinsert=True,
+    )
 
 
 def downgrade() -> None:
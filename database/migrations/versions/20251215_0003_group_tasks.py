@@ -7,7 +7,6 @@ Create Date: 2025-12-15
 """
 from typing import Sequence, Union
 from alembic import op
-import sqlalchemy as sa
 
 
 # revision identifiers, used by Alembic.
@@ -18,31 +17,40 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
-    # Add parent_task_id column for G-ID/P-ID group task relationships
-    op.add_column(
-        'tasks',
-        sa.Column('parent_task_id', sa.Integer(), nullable=True)
-    )
-
-    # Add foreign key constraint
-    op.create_foreign_key(
-        'tasks_parent_task_id_fkey',
-        'tasks',
-        'tasks',
-        ['parent_task_id'],
-        ['id'],
-        ondelete='SET NULL'
-    )
-
-    # Add index for faster child task lookups
-    op.create_index(
-        'ix_tasks_parent_task_id',
-        'tasks',
-        ['parent_task_id']
-    )
+    # Add parent_task_id column for G-ID/P-ID group task relationships,
+    # with its foreign key in the same ALTER TABLE (one lock on tasks).
+    # NOT VALID + VALIDATE below keeps the FK check out of the exclusive lock.
+    op.execute("""
+        ALTER TABLE tasks
+            ADD COLUMN parent_task_id INTEGER,
+            ADD CONSTRAINT tasks_parent_task_id_fkey
+                FOREIGN KEY (parent_task_id) REFERENCES tasks(id) ON DELETE SET NULL
+                NOT VALID
+    """)
+
+    # Add index for faster child task lookups.
+    # tasks is already populated here, so build CONCURRENTLY (SHARE UPDATE
+    # EXCLUSIVE lock) to keep reads/writes flowing. CONCURRENTLY cannot run
+    # inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        # Validation scan takes only SHARE UPDATE EXCLUSIVE
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT tasks_parent_task_id_fkey")
+        op.create_index(
+            'ix_tasks_parent_task_id',
+            'tasks',
+            ['parent_task_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
 
 
 def downgrade() -> None:
-    op.drop_index('ix_tasks_parent_task_id', table_name='tasks')
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_parent_task_id',
+            table_name='tasks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
     op.drop_constraint('tasks_parent_task_id_fkey', 'tasks', type_='foreignkey')
     op.drop_column('tasks', 'parent_task_id')
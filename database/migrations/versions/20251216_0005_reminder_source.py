@@ -8,7 +8,6 @@ Create Date: 2025-12-16
 """
 from typing import Sequence, Union
 from alembic import op
-import sqlalchemy as sa
 
 revision: str = "0005"
 down_revision: Union[str, None] = "0004"
@@ -19,14 +18,12 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     # Add reminder_source column (telegram, google_calendar, both)
     # Default is 'both' to enable all reminders by default
-    op.add_column(
-        'users',
-        sa.Column(
-            'reminder_source',
-            sa.String(20),
-            server_default='both',
-            nullable=False
-        )
+    # Keep as a single ADD COLUMN ... NOT NULL DEFAULT <constant>: on PG 11+
+    # the default is stored in the catalog ("fast default"), so this is O(1)
+    # and does not rewrite the users table. Do not split into
+    # ADD NULL -> UPDATE -> SET NOT NULL.
+    op.execute(
+        "ALTER TABLE users ADD COLUMN reminder_source VARCHAR(20) NOT NULL DEFAULT 'both'"
     )
 
 
@@ -7,7 +7,6 @@ Create Date: 2025-12-18
 Fixes race condition where concurrent task creation could get duplicate IDs.
 """
 from alembic import op
-import sqlalchemy as sa
 
 
 # revision identifiers, used by Alembic.
@@ -18,29 +17,33 @@ depends_on = None
 
 
 def upgrade() -> None:
-    # Get current counter value from bot_config
-    conn = op.get_bind()
-    result = conn.execute(
-        sa.text("SELECT value FROM bot_config WHERE key = 'task_id_counter'")
-    ).fetchone()
+    # Create sequence for atomic task ID generation
+    op.execute("CREATE SEQUENCE IF NOT EXISTS task_id_seq")
 
-    # Start sequence from current counter + 1 to avoid duplicates
-    start_value = int(result[0]) + 1 if result else 1
+    # Hand off the counter server-side in one statement (no read-then-
+    # interpolate round trip). With is_called = true the next nextval()
+    # returns counter + 1; a zero/missing counter starts the sequence at 1.
+    op.execute("""
+        SELECT setval('task_id_seq', GREATEST(c.value, 1), c.value >= 1)
+        FROM (
+            SELECT COALESCE(
+                (SELECT value::bigint FROM bot_config WHERE key = 'task_id_counter'),
+                0
+            ) AS value
+        ) c
+    """)
 
-    # Create sequence for atomic task ID generation
-    op.execute(f"CREATE SEQUENCE IF NOT EXISTS task_id_seq START WITH {start_value}")
+    # The sequence is now the single source of truth
+    op.execute("DELETE FROM bot_config WHERE key = 'task_id_counter'")
 
 
 def downgrade() -> None:
-    # Get current sequence value before dropping
-    conn = op.get_bind()
-    result = conn.execute(sa.text("SELECT last_value FROM task_id_seq")).fetchone()
-
-    if result:
-        # Store value back in bot_config
-        conn.execute(
-            sa.text("UPDATE bot_config SET value = :val WHERE key = 'task_id_counter'"),
-            {"val": str(result[0])}
-        )
+    # Store current sequence value back in bot_config
+    op.execute("""
+        INSERT INTO bot_config (key, value, description)
+        SELECT 'task_id_counter', last_value::text, 'Counter cho task ID'
+        FROM task_id_seq
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    """)
 
     op.execute("DROP SEQUENCE IF EXISTS task_id_seq")
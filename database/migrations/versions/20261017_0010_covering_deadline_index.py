@@ -0,0 +1,43 @@
+"""Make idx_tasks_deadline a covering index
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+Adds INCLUDE columns to the open-task deadline index so deadline scans
+(reminders, overdue lists) can be answered with an index-only scan.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the new index next to the old one, then swap names, so deadline
+    # queries always have an index. CONCURRENTLY needs autocommit.
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_deadline_new
+            ON tasks (deadline)
+            INCLUDE (id, assignee_id, creator_id, status, public_id)
+            WHERE is_deleted = false AND status <> 'completed'
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_deadline")
+        op.execute("ALTER INDEX idx_tasks_deadline_new RENAME TO idx_tasks_deadline")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_deadline_old
+            ON tasks (deadline)
+            WHERE is_deleted = false AND status <> 'completed'
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_deadline")
+        op.execute("ALTER INDEX idx_tasks_deadline_old RENAME TO idx_tasks_deadline")
@@ -0,0 +1,43 @@
+"""Make idx_reminders_pending a covering index
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+
+Adds INCLUDE columns to the pending-reminder index so the due-reminder
+poll reads the reminder fields from index pages only.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partial on is_sent = false: sent rows drop out, so the index stays
+    # bounded by the pending workload. Build new, then swap names.
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reminders_pending_new
+            ON reminders (remind_at)
+            INCLUDE (id, task_id, user_id, reminder_type, reminder_offset)
+            WHERE is_sent = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_reminders_pending")
+        op.execute("ALTER INDEX idx_reminders_pending_new RENAME TO idx_reminders_pending")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reminders_pending_old
+            ON reminders (remind_at)
+            WHERE is_sent = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_reminders_pending")
+        op.execute("ALTER INDEX idx_reminders_pending_old RENAME TO idx_reminders_pending")
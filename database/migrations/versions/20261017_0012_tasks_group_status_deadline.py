@@ -0,0 +1,40 @@
+"""Replace idx_tasks_group with (group_id, status, deadline)
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+
+Group task lists filter by group and status and order by deadline.
+Equality columns come first, the range/order column last, so the scan
+returns rows already in deadline order.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_group_status_deadline
+            ON tasks (group_id, status, deadline)
+            WHERE is_deleted = false
+        """)
+        # group_id-only lookups use the new index prefix
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_group")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_group
+            ON tasks (group_id)
+            WHERE is_deleted = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_group_status_deadline")
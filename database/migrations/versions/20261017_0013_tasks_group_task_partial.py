@@ -0,0 +1,41 @@
+"""Narrow idx_tasks_group_task to live child tasks
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+
+group_task_id is the parent G-ID shared by every child P-ID task, so it
+is not unique (per group or otherwise). All lookups filter
+is_deleted = false and order by created_at, so index exactly that.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_group_task_new
+            ON tasks (group_task_id, created_at)
+            WHERE group_task_id IS NOT NULL AND is_deleted = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_group_task")
+        op.execute("ALTER INDEX idx_tasks_group_task_new RENAME TO idx_tasks_group_task")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_group_task_old
+            ON tasks (group_task_id)
+            WHERE group_task_id IS NOT NULL
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_group_task")
+        op.execute("ALTER INDEX idx_tasks_group_task_old RENAME TO idx_tasks_group_task")
@@ -0,0 +1,39 @@
+"""Enforce upper-case task IDs
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17
+
+Task IDs are generated upper-case and every lookup normalizes input with
+.upper(), so plain equality keeps using the existing btree indexes. These
+CHECK constraints make that invariant explicit, so no caller ever needs
+lower()/upper() in SQL (which would bypass the index).
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOT VALID: brief metadata-only lock; VALIDATE scans without blocking writes
+    op.execute("""
+        ALTER TABLE tasks
+            ADD CONSTRAINT ck_task_public_id_upper
+                CHECK (public_id = upper(public_id)) NOT VALID,
+            ADD CONSTRAINT ck_task_group_task_id_upper
+                CHECK (group_task_id = upper(group_task_id)) NOT VALID
+    """)
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT ck_task_public_id_upper")
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT ck_task_group_task_id_upper")
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_task_group_task_id_upper", "tasks", type_="check")
+    op.drop_constraint("ck_task_public_id_upper", "tasks", type_="check")
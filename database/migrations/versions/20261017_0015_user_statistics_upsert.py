@@ -0,0 +1,47 @@
+"""Support single-row upsert of user_statistics snapshots
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-17
+
+store_user_stats upserts one row per (user, group, period) with
+ON CONFLICT (user_id, COALESCE(group_id, 0), period_type, period_start)
+and sets updated_at. Add the matching unique expression index (the
+plain uq_user_stats never conflicts when group_id is NULL) and the
+updated_at column.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE user_statistics ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now()"
+    )
+
+    # Keep only the newest row per key before adding the unique index
+    op.execute("""
+        DELETE FROM user_statistics us
+        USING user_statistics newer
+        WHERE us.user_id IS NOT DISTINCT FROM newer.user_id
+          AND COALESCE(us.group_id, 0) = COALESCE(newer.group_id, 0)
+          AND us.period_type = newer.period_type
+          AND us.period_start = newer.period_start
+          AND us.id < newer.id
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_user_stats_period
+        ON user_statistics (user_id, COALESCE(group_id, 0), period_type, period_start)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_user_stats_period")
+    op.execute("ALTER TABLE user_statistics DROP COLUMN IF EXISTS updated_at")
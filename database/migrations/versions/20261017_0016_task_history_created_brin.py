@@ -0,0 +1,33 @@
+"""Add BRIN index on task_history.created_at
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-17
+
+task_history is append-only, so created_at follows physical row order.
+A BRIN index serves time-window audit queries at a fraction of the
+size and write cost of a btree.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0016"
+down_revision: Union[str, None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_history_created_brin
+            ON task_history USING BRIN (created_at)
+            WITH (pages_per_range = 32)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_history_created_brin")
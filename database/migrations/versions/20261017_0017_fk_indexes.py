@@ -0,0 +1,44 @@
+"""Index foreign keys that had no supporting index
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-17
+
+Deleting a user (ON DELETE SET NULL/CASCADE) or a recurring parent task
+has to find the referencing rows; without an index on the FK column
+that is a sequential scan of the child table. The columns are mostly
+NULL, so partial indexes keep them small. recurring_templates.creator_id
+is already covered by idx_recurring_creator.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0017"
+down_revision: Union[str, None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FK_INDEXES = [
+    ("idx_reminders_user", "reminders", "user_id"),
+    ("idx_history_user", "task_history", "user_id"),
+    ("idx_tasks_deleted_by", "tasks", "deleted_by"),
+    ("idx_tasks_parent_recurring", "tasks", "parent_recurring_id"),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in FK_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} ({column}) WHERE {column} IS NOT NULL"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in FK_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,93 @@
+"""Store task status/priority and reminder type as native enums
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-17
+
+Replaces the VARCHAR + CHECK columns with PostgreSQL ENUM types. Values
+take 4 bytes on disk and compare as integers. Enum order follows the
+declaration, so priority sorts low < normal < high < urgent directly.
+
+reminder_type includes 'creator_overdue', which the reminder code
+already inserts but the old CHECK constraint rejected.
+
+Changing the column types rewrites tasks and reminders under an
+ACCESS EXCLUSIVE lock; run during a quiet period.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0018"
+down_revision: Union[str, None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_deadline_index() -> None:
+    # Predicate must be re-parsed against the new column type, otherwise it
+    # keeps the old text comparison and the planner can no longer match it.
+    op.execute("""
+        CREATE INDEX idx_tasks_deadline
+        ON tasks (deadline)
+        INCLUDE (id, assignee_id, creator_id, status, public_id)
+        WHERE is_deleted = false AND status <> 'completed'
+    """)
+
+
+def upgrade() -> None:
+    op.execute("CREATE TYPE task_status AS ENUM ('pending', 'in_progress', 'completed')")
+    op.execute("CREATE TYPE task_priority AS ENUM ('low', 'normal', 'high', 'urgent')")
+    op.execute(
+        "CREATE TYPE reminder_type AS ENUM "
+        "('before_deadline', 'after_deadline', 'creator_overdue', 'custom')"
+    )
+
+    op.execute("DROP INDEX IF EXISTS idx_tasks_deadline")
+    op.execute("""
+        ALTER TABLE tasks
+            DROP CONSTRAINT IF EXISTS ck_task_status,
+            DROP CONSTRAINT IF EXISTS ck_task_priority,
+            ALTER COLUMN status DROP DEFAULT,
+            ALTER COLUMN priority DROP DEFAULT,
+            ALTER COLUMN status TYPE task_status USING status::task_status,
+            ALTER COLUMN priority TYPE task_priority USING priority::task_priority,
+            ALTER COLUMN status SET DEFAULT 'pending',
+            ALTER COLUMN priority SET DEFAULT 'normal'
+    """)
+    _create_deadline_index()
+
+    op.execute("""
+        ALTER TABLE reminders
+            DROP CONSTRAINT IF EXISTS ck_reminder_type,
+            ALTER COLUMN reminder_type TYPE reminder_type USING reminder_type::reminder_type
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        ALTER TABLE reminders
+            ALTER COLUMN reminder_type TYPE VARCHAR(50) USING reminder_type::text,
+            ADD CONSTRAINT ck_reminder_type CHECK (
+                reminder_type IN ('before_deadline', 'after_deadline', 'creator_overdue', 'custom')
+            )
+    """)
+
+    op.execute("DROP INDEX IF EXISTS idx_tasks_deadline")
+    op.execute("""
+        ALTER TABLE tasks
+            ALTER COLUMN status DROP DEFAULT,
+            ALTER COLUMN priority DROP DEFAULT,
+            ALTER COLUMN status TYPE VARCHAR(20) USING status::text,
+            ALTER COLUMN priority TYPE VARCHAR(20) USING priority::text,
+            ALTER COLUMN status SET DEFAULT 'pending',
+            ALTER COLUMN priority SET DEFAULT 'normal',
+            ADD CONSTRAINT ck_task_status CHECK (status IN ('pending', 'in_progress', 'completed')),
+            ADD CONSTRAINT ck_task_priority CHECK (priority IN ('low', 'normal', 'high', 'urgent'))
+    """)
+    _create_deadline_index()
+
+    op.execute("DROP TYPE IF EXISTS reminder_type")
+    op.execute("DROP TYPE IF EXISTS task_priority")
+    op.execute("DROP TYPE IF EXISTS task_status")
@@ -0,0 +1,138 @@
+"""Range-partition task_history by created_at
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-17
+
+task_history is an append-only audit log and grows without bound.
+Monthly partitions let old history be detached or dropped in O(1)
+instead of a bloating DELETE. create_task_history_partitions() creates
+the partitions; the reminder scheduler calls it daily to keep a few
+months ready ahead of time. A DEFAULT partition catches anything
+outside the precreated range.
+
+Existing rows are copied into the new table; the id sequence is kept.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0019"
+down_revision: Union[str, None] = "0018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HISTORY_COLUMNS = "id, task_id, user_id, action, field_name, old_value, new_value, note, created_at"
+
+
+def _create_indexes() -> None:
+    op.execute("CREATE INDEX idx_history_task ON task_history (task_id, created_at)")
+    op.execute("CREATE INDEX idx_history_user ON task_history (user_id) WHERE user_id IS NOT NULL")
+    op.execute("""
+        CREATE INDEX idx_history_created_brin
+        ON task_history USING BRIN (created_at)
+        WITH (pages_per_range = 32)
+    """)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE task_history RENAME TO task_history_old")
+    op.execute("ALTER INDEX task_history_pkey RENAME TO task_history_old_pkey")
+
+    op.execute("""
+        CREATE TABLE task_history (
+            id INTEGER NOT NULL DEFAULT nextval('task_history_id_seq'),
+            task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            user_id INTEGER REFERENCES users(id),
+            action VARCHAR(50) NOT NULL,
+            field_name VARCHAR(100),
+            old_value TEXT,
+            new_value TEXT,
+            note TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE task_history_id_seq OWNED BY task_history.id")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION create_task_history_partitions(
+            months_ahead INTEGER DEFAULT 3,
+            from_month DATE DEFAULT date_trunc('month', now())::date
+        ) RETURNS INTEGER AS $$
+        DECLARE
+            month_start DATE;
+            partition_name TEXT;
+            created INTEGER := 0;
+        BEGIN
+            FOR month_start IN
+                SELECT generate_series(
+                    date_trunc('month', from_month),
+                    date_trunc('month', now()) + make_interval(months => months_ahead),
+                    interval '1 month'
+                )::date
+            LOOP
+                partition_name := 'task_history_' || to_char(month_start, 'YYYY_MM');
+                IF to_regclass(partition_name) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF task_history FOR VALUES FROM (%L) TO (%L)',
+                        partition_name,
+                        month_start::timestamptz,
+                        (month_start + interval '1 month')::timestamptz
+                    );
+                    created := created + 1;
+                END IF;
+            END LOOP;
+            RETURN created;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Partitions for every month that already has history, then the DEFAULT
+    op.execute("""
+        SELECT create_task_history_partitions(
+            3,
+            COALESCE((SELECT min(created_at) FROM task_history_old), now())::date
+        )
+    """)
+    op.execute("CREATE TABLE task_history_default PARTITION OF task_history DEFAULT")
+
+    op.execute(f"""
+        INSERT INTO task_history ({HISTORY_COLUMNS})
+        SELECT id, task_id, user_id, action, field_name, old_value, new_value, note,
+               COALESCE(created_at, now())
+        FROM task_history_old
+    """)
+    op.execute("DROP TABLE task_history_old")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE task_history RENAME TO task_history_partitioned")
+    op.execute("ALTER INDEX task_history_pkey RENAME TO task_history_partitioned_pkey")
+    for index in ("idx_history_task", "idx_history_user", "idx_history_created_brin"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE task_history (
+            id INTEGER NOT NULL DEFAULT nextval('task_history_id_seq') PRIMARY KEY,
+            task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            user_id INTEGER REFERENCES users(id),
+            action VARCHAR(50) NOT NULL,
+            field_name VARCHAR(100),
+            old_value TEXT,
+            new_value TEXT,
+            note TEXT,
+            created_at TIMESTAMPTZ DEFAULT now()
+        )
+    """)
+    op.execute("ALTER SEQUENCE task_history_id_seq OWNED BY task_history.id")
+    op.execute(f"""
+        INSERT INTO task_history ({HISTORY_COLUMNS})
+        SELECT {HISTORY_COLUMNS} FROM task_history_partitioned
+    """)
+    op.execute("DROP TABLE task_history_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS create_task_history_partitions(INTEGER, DATE)")
+    _create_indexes()
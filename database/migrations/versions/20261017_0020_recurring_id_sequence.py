@@ -0,0 +1,49 @@
+"""Move the recurring template ID counter from bot_config to a sequence
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-17
+
+generate_recurring_id() was the only runtime access to bot_config: a
+text read-modify-write on a single hot row. A sequence gives a typed,
+lock-free counter, as task_id_seq does for task IDs.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0020"
+down_revision: Union[str, None] = "0019"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS recurring_id_seq")
+
+    # Same handoff as task_id_seq: next nextval() returns counter + 1
+    op.execute("""
+        SELECT setval('recurring_id_seq', GREATEST(c.value, 1), c.value >= 1)
+        FROM (
+            SELECT COALESCE(
+                (SELECT value::bigint FROM bot_config WHERE key = 'recurring_id_counter'),
+                0
+            ) AS value
+        ) c
+    """)
+
+    op.execute("DELETE FROM bot_config WHERE key = 'recurring_id_counter'")
+
+
+def downgrade() -> None:
+    op.execute("""
+        INSERT INTO bot_config (key, value, description)
+        SELECT 'recurring_id_counter',
+               CASE WHEN is_called THEN last_value ELSE 0 END::text,
+               'Counter cho recurring task ID'
+        FROM recurring_id_seq
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    """)
+
+    op.execute("DROP SEQUENCE IF EXISTS recurring_id_seq")
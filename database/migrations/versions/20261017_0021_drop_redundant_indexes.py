@@ -0,0 +1,40 @@
+"""Drop indexes duplicated by unique constraints
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-17
+
+Each of these is a plain btree on exactly the columns (or a leading
+prefix of the columns) of an existing unique constraint, so the planner
+never needs it and every insert pays for it twice.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0021"
+down_revision: Union[str, None] = "0020"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+REDUNDANT_INDEXES = [
+    ("idx_users_telegram", "users", "telegram_id"),  # users_telegram_id_key
+    ("idx_groups_telegram", "groups", "telegram_id"),  # groups_telegram_id_key
+    ("idx_tasks_public", "tasks", "public_id"),  # tasks_public_id_key
+    ("idx_recurring_public", "recurring_templates", "public_id"),  # recurring_templates_public_id_key
+    ("idx_gm_group", "group_members", "group_id"),  # prefix of uq_group_user
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in REDUNDANT_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in REDUNDANT_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column})")
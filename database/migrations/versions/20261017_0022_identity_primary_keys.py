@@ -0,0 +1,81 @@
+"""Convert SERIAL primary keys to identity columns with a sequence cache
+
+Revision ID: 0022
+Revises: 0021
+Create Date: 2026-10-17
+
+Replaces each SERIAL id (DEFAULT nextval('<table>_id_seq')) with
+GENERATED BY DEFAULT AS IDENTITY, continuing from the old sequence's
+position. CACHE 32 lets each backend reserve 32 ids per sequence
+access, so concurrent inserts no longer fetch (and WAL-log) every
+nextval on the shared sequence.
+
+Not cached on purpose: task_id_seq and recurring_id_seq back the
+user-visible P/G/R IDs. A per-backend cache would hand them out out of
+order and leave gaps after every restart.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0022"
+down_revision: Union[str, None] = "0021"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+IDENTITY_TABLES = [
+    "users",
+    "groups",
+    "group_members",
+    "tasks",
+    "reminders",
+    "user_statistics",
+    "deleted_tasks_undo",
+    "recurring_templates",
+    "export_reports",
+]
+
+SEQUENCE_CACHE = 32
+
+
+def upgrade() -> None:
+    for table in IDENTITY_TABLES:
+        op.execute(f"""
+            DO $$
+            DECLARE
+                next_id BIGINT;
+            BEGIN
+                SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END
+                INTO next_id FROM {table}_id_seq;
+
+                ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT;
+                DROP SEQUENCE {table}_id_seq;
+                ALTER TABLE {table} ALTER COLUMN id
+                    ADD GENERATED BY DEFAULT AS IDENTITY (CACHE {SEQUENCE_CACHE});
+                EXECUTE format('ALTER TABLE {table} ALTER COLUMN id RESTART WITH %s', next_id);
+            END $$
+        """)
+
+    # task_history is partitioned and keeps its explicit sequence default
+    op.execute(f"ALTER SEQUENCE task_history_id_seq CACHE {SEQUENCE_CACHE}")
+
+
+def downgrade() -> None:
+    op.execute("ALTER SEQUENCE task_history_id_seq CACHE 1")
+
+    for table in IDENTITY_TABLES:
+        op.execute(f"""
+            DO $$
+            DECLARE
+                next_id BIGINT;
+            BEGIN
+                SELECT COALESCE(MAX(id), 0) + 1 INTO next_id FROM {table};
+
+                ALTER TABLE {table} ALTER COLUMN id DROP IDENTITY;
+                CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id;
+                PERFORM setval('{table}_id_seq', next_id, false);
+                ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq');
+            END $$
+        """)
@@ -0,0 +1,28 @@
+"""Stop storing full task snapshots in deleted_tasks_undo
+
+Revision ID: 0023
+Revises: 0022
+Create Date: 2026-10-17
+
+Deletes are soft, so undo restores the task row in place and never read
+the snapshot. task_data becomes optional: single deletes store nothing
+and bulk deletes store only the list of task IDs.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0023"
+down_revision: Union[str, None] = "0022"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column("deleted_tasks_undo", "task_data", nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE deleted_tasks_undo SET task_data = '{}'::jsonb WHERE task_data IS NULL")
+    op.alter_column("deleted_tasks_undo", "task_data", nullable=False)
@@ -0,0 +1,28 @@
+"""Leave free space on tasks pages for HOT updates
+
+Revision ID: 0024
+Revises: 0023
+Create Date: 2026-10-17
+
+Most task updates (content, progress, description, updated_at) touch no
+indexed column, so they can be heap-only (HOT) updates as long as the
+new row version fits on the same page. fillfactor = 90 keeps that room.
+Existing pages pick it up as they are rewritten (VACUUM FULL/CLUSTER).
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0024"
+down_revision: Union[str, None] = "0023"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE tasks SET (fillfactor = 90)")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE tasks RESET (fillfactor)")
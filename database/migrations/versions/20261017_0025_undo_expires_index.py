@@ -0,0 +1,39 @@
+"""Index all deleted_tasks_undo rows by expires_at for the sweeper
+
+Revision ID: 0025
+Revises: 0024
+Create Date: 2026-10-17
+
+The undo sweeper now deletes every row past its expiry, restored or
+not, so the index must not exclude restored rows.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0025"
+down_revision: Union[str, None] = "0024"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_undo_expires_new
+            ON deleted_tasks_undo (expires_at)
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_undo_expires")
+        op.execute("ALTER INDEX idx_undo_expires_new RENAME TO idx_undo_expires")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_undo_expires_old
+            ON deleted_tasks_undo (expires_at)
+            WHERE is_restored = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_undo_expires")
+        op.execute("ALTER INDEX idx_undo_expires_old RENAME TO idx_undo_expires")
@@ -0,0 +1,28 @@
+"""Add tasks.version for optimistic concurrency control
+
+Revision ID: 0026
+Revises: 0025
+Create Date: 2026-10-17
+
+Task updates read the row, check permissions, then write. They now
+bump version and require it unchanged (WHERE id = $1 AND version = $n),
+so a concurrent edit is reported instead of silently overwritten.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0026"
+down_revision: Union[str, None] = "0025"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant default: metadata-only change, no table rewrite
+    op.execute("ALTER TABLE tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS version")
@@ -0,0 +1,41 @@
+"""Add deadline to idx_tasks_assignee_status
+
+Revision ID: 0027
+Revises: 0026
+Create Date: 2026-10-17
+
+Assignee task lists filter on assignee_id (and often one status) and
+order or range-filter on deadline. With deadline as the trailing key
+those rows come out of the index already in deadline order.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0027"
+down_revision: Union[str, None] = "0026"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_assignee_status_new
+            ON tasks (assignee_id, status, deadline)
+            WHERE is_deleted = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_assignee_status")
+        op.execute("ALTER INDEX idx_tasks_assignee_status_new RENAME TO idx_tasks_assignee_status")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tasks_assignee_status_old
+            ON tasks (assignee_id, status)
+            WHERE is_deleted = false
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tasks_assignee_status")
+        op.execute("ALTER INDEX idx_tasks_assignee_status_old RENAME TO idx_tasks_assignee_status")
@@ -0,0 +1,37 @@
+"""Store recurring_templates.priority as the task_priority enum
+
+Revision ID: 0028
+Revises: 0027
+Create Date: 2026-10-17
+
+0018 moved tasks.status/priority to native enums; templates still kept
+priority as VARCHAR. Use the same type so template values are checked
+and stored like the tasks they generate.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0028"
+down_revision: Union[str, None] = "0027"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE recurring_templates
+            ALTER COLUMN priority DROP DEFAULT,
+            ALTER COLUMN priority TYPE task_priority USING priority::task_priority,
+            ALTER COLUMN priority SET DEFAULT 'normal'
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        ALTER TABLE recurring_templates
+            ALTER COLUMN priority DROP DEFAULT,
+            ALTER COLUMN priority TYPE VARCHAR(20) USING priority::text,
+            ALTER COLUMN priority SET DEFAULT 'normal'
+    """)
@@ -0,0 +1,39 @@
+"""NOTIFY user_changed on every users update/delete
+
+Revision ID: 0029
+Revises: 0028
+Create Date: 2026-10-17
+
+The bot caches users rows in-process (services.user_service) and drops
+an entry when its telegram_id arrives on the user_changed channel.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0029"
+down_revision: Union[str, None] = "0028"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('user_changed', OLD.telegram_id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_users_notify_changed
+        AFTER UPDATE OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION notify_user_changed()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_users_notify_changed ON users")
+    op.execute("DROP FUNCTION IF EXISTS notify_user_changed()")
@@ -0,0 +1,32 @@
+"""Drop uq_user_stats, superseded by uq_user_stats_period
+
+Revision ID: 0030
+Revises: 0029
+Create Date: 2026-10-17
+
+uq_user_stats_period enforces uniqueness on (user_id, COALESCE(group_id, 0),
+period_type, period_start), which is strictly tighter than the plain
+uq_user_stats constraint and is the only one used as an upsert target.
+Keeping both means two unique btrees updated on every statistics write.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0030"
+down_revision: Union[str, None] = "0029"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint("uq_user_stats", "user_statistics", type_="unique")
+
+
+def downgrade() -> None:
+    op.create_unique_constraint(
+        "uq_user_stats",
+        "user_statistics",
+        ["user_id", "group_id", "period_type", "period_start"],
+    )
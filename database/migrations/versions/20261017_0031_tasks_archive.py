@@ -0,0 +1,107 @@
+"""Move long-deleted tasks out of tasks into tasks_archive
+
+Revision ID: 0031
+Revises: 0030
+Create Date: 2026-10-17
+
+Soft-deleted tasks can only be restored through their undo record,
+which expires after 30 seconds; after that they are never read again
+but stay in the tasks heap (and in the is_deleted = false predicate of
+every index) forever. archive_deleted_tasks() moves them to a plain
+tasks_archive copy of the table with DELETE ... RETURNING; the reminder
+scheduler calls it nightly.
+
+Deleting a task cascades to its task_history rows, so the function first
+copies that audit trail into task_history_archive. Tasks still referenced
+by a row that stays behind (a child via parent_task_id or a recurring
+instance via parent_recurring_id) are skipped, so those links are never
+nulled out or blocked by the FK; they are archived together once every
+referencing row is eligible too.
+
+tasks_archive and task_history_archive are created with LIKE, so columns
+added to tasks or task_history later must be added to the archive copy
+in the same revision.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers
+revision: str = "0031"
+down_revision: Union[str, None] = "0030"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE tasks_archive (
+            LIKE tasks INCLUDING DEFAULTS,
+            PRIMARY KEY (id)
+        )
+    """)
+    # Plain (unpartitioned) copy; no DEFAULTS so it doesn't share the
+    # task_history id sequence
+    op.execute("""
+        CREATE TABLE task_history_archive (
+            LIKE task_history,
+            PRIMARY KEY (id, created_at)
+        )
+    """)
+    op.execute("CREATE INDEX idx_history_archive_task ON task_history_archive (task_id)")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION archive_deleted_tasks(
+            older_than INTERVAL DEFAULT interval '30 days',
+            batch_size INTEGER DEFAULT 1000
+        ) RETURNS INTEGER AS $$
+        DECLARE
+            cutoff TIMESTAMPTZ := now() - older_than;
+            doomed INTEGER[];
+            moved INTEGER;
+        BEGIN
+            SELECT array_agg(id) INTO doomed
+            FROM (
+                SELECT t.id FROM tasks t
+                WHERE t.is_deleted = true AND t.deleted_at < cutoff
+                  -- Keep rows that something staying in tasks still points at
+                  AND NOT EXISTS (
+                      SELECT 1 FROM tasks c
+                      WHERE (c.parent_task_id = t.id OR c.parent_recurring_id = t.id)
+                        AND NOT (c.is_deleted AND c.deleted_at < cutoff)
+                  )
+                ORDER BY t.deleted_at
+                LIMIT batch_size
+                FOR UPDATE SKIP LOCKED
+            ) s;
+
+            IF doomed IS NULL THEN
+                RETURN 0;
+            END IF;
+
+            -- Save the audit trail before the delete cascades it away
+            INSERT INTO task_history_archive
+            SELECT h.* FROM task_history h WHERE h.task_id = ANY(doomed);
+
+            WITH gone AS (
+                DELETE FROM tasks t
+                WHERE t.id = ANY(doomed)
+                RETURNING t.*
+            )
+            INSERT INTO tasks_archive SELECT * FROM gone;
+            GET DIAGNOSTICS moved = ROW_COUNT;
+            RETURN moved;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS archive_deleted_tasks(INTERVAL, INTEGER)")
+    op.execute("INSERT INTO tasks SELECT * FROM tasks_archive ON CONFLICT (id) DO NOTHING")
+    op.execute("""
+        INSERT INTO task_history SELECT * FROM task_history_archive
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("DROP TABLE IF EXISTS task_history_archive")
+    op.execute("DROP TABLE IF EXISTS tasks_archive")
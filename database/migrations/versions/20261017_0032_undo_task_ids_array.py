@@ -0,0 +1,42 @@
+"""Store bulk undo task IDs as INTEGER[] instead of JSONB
+
+Revision ID: 0032
+Revises: 0031
+Create Date: 2026-10-17
+
+Since 0023 deleted_tasks_undo.task_data only ever holds
+{"bulk": true, "task_ids": [...]} for bulk deletes and is never queried
+structurally. A native integer array drops the JSON encode/decode and
+the repeated keys; a non-NULL task_ids marks a bulk record.
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision: str = "0032"
+down_revision: Union[str, None] = "0031"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("deleted_tasks_undo", sa.Column("task_ids", postgresql.ARRAY(sa.Integer())))
+    op.execute("""
+        UPDATE deleted_tasks_undo
+        SET task_ids = ARRAY(SELECT jsonb_array_elements_text(task_data -> 'task_ids')::int)
+        WHERE (task_data ->> 'bulk')::boolean IS TRUE
+    """)
+    op.drop_column("deleted_tasks_undo", "task_data")
+
+
+def downgrade() -> None:
+    op.add_column("deleted_tasks_undo", sa.Column("task_data", postgresql.JSONB()))
+    op.execute("""
+        UPDATE deleted_tasks_undo
+        SET task_data = jsonb_build_object('bulk', true, 'task_ids', to_jsonb(task_ids))
+        WHERE task_ids IS NOT NULL
+    """)
+    op.drop_column("deleted_tasks_undo", "task_ids")
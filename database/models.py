@@ -12,7 +12,9 @@ from sqlalchemy import (
     Column,
     Date,
     DateTime,
+    Enum,
     ForeignKey,
+    Identity,
     Index,
     Integer,
     String,
@@ -21,12 +23,19 @@ from sqlalchemy import (
     CheckConstraint,
     func,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
 class Base(DeclarativeBase):
-    """Base class for all models."""
+    """
+    Base class for all models.
+
+    Runtime queries are raw asyncpg SQL; these models describe the schema
+    for Alembic. Relationships are lazy="raise" so any ORM code added
+    later has to load them explicitly instead of issuing a query per
+    attribute access.
+    """
     pass
 
 
@@ -37,8 +46,8 @@ class User(Base):
     """
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True)
-    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False)
     username = Column(String(255), index=True)
     first_name = Column(String(255))
     last_name = Column(String(255))
@@ -62,10 +71,10 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    created_tasks = relationship("Task", back_populates="creator", foreign_keys="Task.creator_id")
-    assigned_tasks = relationship("Task", back_populates="assignee", foreign_keys="Task.assignee_id")
-    group_memberships = relationship("GroupMember", back_populates="user")
-    statistics = relationship("UserStatistics", back_populates="user")
+    created_tasks = relationship("Task", back_populates="creator", foreign_keys="Task.creator_id", lazy="raise")
+    assigned_tasks = relationship("Task", back_populates="assignee", foreign_keys="Task.assignee_id", lazy="raise")
+    group_memberships = relationship("GroupMember", back_populates="user", lazy="raise")
+    statistics = relationship("UserStatistics", back_populates="user", lazy="raise")
 
     def __repr__(self):
         return f"<User(id={self.id}, telegram_id={self.telegram_id}, username={self.username})>"
@@ -78,17 +87,17 @@ class Group(Base):
     """
     __tablename__ = "groups"
 
-    id = Column(Integer, primary_key=True)
-    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False)
     title = Column(String(255))
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    members = relationship("GroupMember", back_populates="group")
-    tasks = relationship("Task", back_populates="group")
-    statistics = relationship("UserStatistics", back_populates="group")
+    members = relationship("GroupMember", back_populates="group", lazy="raise")
+    tasks = relationship("Task", back_populates="group", lazy="raise")
+    statistics = relationship("UserStatistics", back_populates="group", lazy="raise")
 
     def __repr__(self):
         return f"<Group(id={self.id}, telegram_id={self.telegram_id}, title={self.title})>"
@@ -101,19 +110,18 @@ class GroupMember(Base):
     """
     __tablename__ = "group_members"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
     group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     role = Column(String(50), default="member")  # 'admin', 'member'
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    group = relationship("Group", back_populates="members")
-    user = relationship("User", back_populates="group_memberships")
+    group = relationship("Group", back_populates="members", lazy="raise")
+    user = relationship("User", back_populates="group_memberships", lazy="raise")
 
     __table_args__ = (
         UniqueConstraint("group_id", "user_id", name="uq_group_user"),
-        Index("idx_gm_group", "group_id"),
         Index("idx_gm_user", "user_id"),
     )
 
@@ -128,24 +136,25 @@ class Task(Base):
     """
     __tablename__ = "tasks"
 
-    id = Column(Integer, primary_key=True)
-    public_id = Column(String(20), unique=True, nullable=False, index=True)  # P-1234 or G-500
-    group_task_id = Column(String(20), index=True)  # Parent G-ID for group tasks
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
+    public_id = Column(String(20), unique=True, nullable=False)  # P-1234 or G-500
+    group_task_id = Column(String(20))  # Parent G-ID for group tasks
 
     content = Column(Text, nullable=False)
     description = Column(Text)
 
     status = Column(
-        String(20),
+        Enum("pending", "in_progress", "completed", name="task_status"),
         default="pending",
         nullable=False,
     )
     priority = Column(
-        String(20),
+        Enum("low", "normal", "high", "urgent", name="task_priority"),
         default="normal",
         nullable=False,
     )
     progress = Column(Integer, default=0)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Optimistic lock
 
     # Relationships - with proper cascade behavior
     creator_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
@@ -157,6 +166,8 @@ class Task(Base):
     completed_at = Column(DateTime(timezone=True))
 
     # Recurring (Phase 09)
+    # Legacy per-task recurrence, never read: the generator scans
+    # recurring_templates (typed recurrence_* columns, idx_recurring_next)
     is_recurring = Column(Boolean, default=False)
     recurring_pattern = Column(String(100))  # 'daily', 'weekly', 'monthly', 'custom'
     recurring_config = Column(JSONB)  # {'interval': 1, 'days': [1,3,5], ...}
@@ -167,7 +178,9 @@ class Task(Base):
 
     # Flags
     is_personal = Column(Boolean, default=False)
-    is_deleted = Column(Boolean, default=False, index=True)
+    # Deleted rows move to tasks_archive (same columns) after 30 days,
+    # their history to task_history_archive
+    is_deleted = Column(Boolean, default=False)
     deleted_at = Column(DateTime(timezone=True))
     deleted_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
 
@@ -175,21 +188,54 @@ class Task(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    creator = relationship("User", back_populates="created_tasks", foreign_keys=[creator_id])
-    assignee = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
-    group = relationship("Group", back_populates="tasks")
-    reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan")
-    history = relationship("TaskHistory", back_populates="task", cascade="all, delete-orphan")
-    parent_recurring = relationship("Task", remote_side=[id], foreign_keys=[parent_recurring_id])
+    creator = relationship("User", back_populates="created_tasks", foreign_keys=[creator_id], lazy="raise")
+    assignee = relationship("User", back_populates="assigned_tasks", foreign_keys=[assignee_id], lazy="raise")
+    group = relationship("Group", back_populates="tasks", lazy="raise")
+    reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan", lazy="raise")
+    history = relationship("TaskHistory", back_populates="task", cascade="all, delete-orphan", lazy="raise")
+    parent_recurring = relationship("Task", remote_side=[id], foreign_keys=[parent_recurring_id], lazy="raise")
 
     __table_args__ = (
-        CheckConstraint("status IN ('pending', 'in_progress', 'completed')", name="ck_task_status"),
-        CheckConstraint("priority IN ('low', 'normal', 'high', 'urgent')", name="ck_task_priority"),
         CheckConstraint("progress >= 0 AND progress <= 100", name="ck_task_progress"),
-        Index("idx_tasks_assignee_status", "assignee_id", "status", postgresql_where="is_deleted = false"),
+        CheckConstraint("public_id = upper(public_id)", name="ck_task_public_id_upper"),
+        CheckConstraint("group_task_id = upper(group_task_id)", name="ck_task_group_task_id_upper"),
+        Index(
+            "idx_tasks_assignee_status",
+            "assignee_id",
+            "status",
+            "deadline",
+            postgresql_where="is_deleted = false",
+        ),
         Index("idx_tasks_creator", "creator_id", postgresql_where="is_deleted = false"),
-        Index("idx_tasks_deadline", "deadline", postgresql_where="is_deleted = false AND status != 'completed'"),
-        Index("idx_tasks_group", "group_id", postgresql_where="is_deleted = false"),
+        Index(
+            "idx_tasks_group_task",
+            "group_task_id",
+            "created_at",
+            postgresql_where="group_task_id IS NOT NULL AND is_deleted = false",
+        ),
+        # Open-task deadline index; also the overdue index. Overdue queries
+        # must repeat its predicate (is_deleted = false AND status != 'completed')
+        # and add deadline < now() for the planner to use it.
+        Index(
+            "idx_tasks_deadline",
+            "deadline",
+            postgresql_where="is_deleted = false AND status != 'completed'",
+            postgresql_include=["id", "assignee_id", "creator_id", "status", "public_id"],
+        ),
+        Index(
+            "idx_tasks_group_status_deadline",
+            "group_id",
+            "status",
+            "deadline",
+            postgresql_where="is_deleted = false",
+        ),
+        Index("idx_tasks_deleted_by", "deleted_by", postgresql_where="deleted_by IS NOT NULL"),
+        Index(
+            "idx_tasks_parent_recurring",
+            "parent_recurring_id",
+            postgresql_where="parent_recurring_id IS NOT NULL",
+        ),
+        {"postgresql_with": {"fillfactor": 90}},
     )
 
     def __repr__(self):
@@ -203,13 +249,13 @@ class Reminder(Base):
     """
     __tablename__ = "reminders"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
 
     remind_at = Column(DateTime(timezone=True), nullable=False)
     reminder_type = Column(
-        String(50),
+        Enum("before_deadline", "after_deadline", "creator_overdue", "custom", name="reminder_type"),
         nullable=False,
     )
     reminder_offset = Column(String(20))  # '3d', '24h', '1h'
@@ -221,16 +267,19 @@ class Reminder(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    task = relationship("Task", back_populates="reminders")
-    user = relationship("User")
+    task = relationship("Task", back_populates="reminders", lazy="raise")
+    user = relationship("User", lazy="raise")
 
     __table_args__ = (
-        CheckConstraint(
-            "reminder_type IN ('before_deadline', 'after_deadline', 'custom')",
-            name="ck_reminder_type"
+        Index(
+            "idx_reminders_pending",
+            "remind_at",
+            postgresql_where="is_sent = false",
+            postgresql_include=["id", "task_id", "user_id", "reminder_type", "reminder_offset"],
         ),
-        Index("idx_reminders_pending", "remind_at", postgresql_where="is_sent = false"),
+        # Not covered by idx_reminders_pending: task_id lookups and FK cascades
         Index("idx_reminders_task", "task_id"),
+        Index("idx_reminders_user", "user_id", postgresql_where="user_id IS NOT NULL"),
     )
 
     def __repr__(self):
@@ -244,6 +293,7 @@ class TaskHistory(Base):
     """
     __tablename__ = "task_history"
 
+    # Range-partitioned by created_at, so the key is part of the primary key
     id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
@@ -254,14 +304,22 @@ class TaskHistory(Base):
     new_value = Column(Text)
     note = Column(Text)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
     # Relationships
-    task = relationship("Task", back_populates="history")
-    user = relationship("User")
+    task = relationship("Task", back_populates="history", lazy="raise")
+    user = relationship("User", lazy="raise")
 
     __table_args__ = (
         Index("idx_history_task", "task_id", "created_at"),
+        Index("idx_history_user", "user_id", postgresql_where="user_id IS NOT NULL"),
+        Index(
+            "idx_history_created_brin",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def __repr__(self):
@@ -275,7 +333,7 @@ class UserStatistics(Base):
     """
     __tablename__ = "user_statistics"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"))
 
@@ -298,13 +356,22 @@ class UserStatistics(Base):
     tasks_personal_completed = Column(Integer, default=0)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="statistics")
-    group = relationship("Group", back_populates="statistics")
+    user = relationship("User", back_populates="statistics", lazy="raise")
+    group = relationship("Group", back_populates="statistics", lazy="raise")
 
     __table_args__ = (
-        UniqueConstraint("user_id", "group_id", "period_type", "period_start", name="uq_user_stats"),
+        # Upsert target for store_user_stats (NULL group_id treated as 0)
+        Index(
+            "uq_user_stats_period",
+            "user_id",
+            func.coalesce(group_id, 0),
+            "period_type",
+            "period_start",
+            unique=True,
+        ),
         Index("idx_stats_user", "user_id", "period_type", "period_start"),
     )
 
@@ -319,19 +386,19 @@ class DeletedTaskUndo(Base):
     """
     __tablename__ = "deleted_tasks_undo"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Identity(always=False, cache=32), primary_key=True)
     task_id = Column(Integer, nullable=False)  # Original task ID
-    task_data = Column(JSONB, nullable=False)  # Full task snapshot
+    task_ids = Column(ARRAY(Integer))  # Bulk deletes only; NULL for single deletes
     deleted_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     deleted_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True))  # Calculated: deleted_at + 30 seconds
     is_restored = Column(Boolean, default=False)
 
     # Relationships
-    user = relationship("User")
+    user = relationship("User", lazy="raise")
 
     __table_args__ = (
-        Index("idx_undo_expires", "expires_at", postgresql_where="is_restored = false"),
+        Index("idx_undo_expires", "expires_at"),
     )
 
     def __repr__(self):
@@ -10,7 +10,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
 
 from database import get_db
-from services import get_or_create_user
+from services import get_or_create_user, invalidate_cached_user
 from utils.db_utils import validate_user_setting_column, InvalidColumnError
 from services.calendar_service import (
     is_calendar_enabled,
@@ -63,6 +63,7 @@ async def update_user_setting(db, telegram_id: int, column: str, value) -> None:
         f"UPDATE users SET {validated_column} = $1 WHERE telegram_id = $2",
         value, telegram_id
     )
+    invalidate_cached_user(telegram_id)
 
 
 def calendar_connected_keyboard(sync_mode: str) -> InlineKeyboardMarkup:
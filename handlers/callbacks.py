@@ -3,22 +3,151 @@ Callback Query Handler
 Routes inline button callbacks to appropriate handlers
 """
 
+import asyncio
 import logging
-import re
 import time
-from collections import defaultdict
+from collections import OrderedDict
 from functools import wraps
 from typing import Callable, Optional, Tuple
-from telegram import Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity, Update
 from telegram.ext import ContextTypes, CallbackQueryHandler, MessageHandler, filters
 
 
 # =============================================================================
 # Rate Limiting
 # =============================================================================
-_rate_limits: dict = defaultdict(list)
-RATE_LIMIT = 30  # max requests per window
-RATE_WINDOW = 60  # seconds
+RATE_LIMIT = 30  # max requests per window (bucket capacity)
+RATE_WINDOW = 60  # seconds to refill a full bucket
+RATE_REFILL = RATE_LIMIT / RATE_WINDOW  # tokens per second
+MAX_TRACKED_USERS = 100_000
+
+# Token bucket per user: (tokens, last refill time), refilled lazily on
+# access. Kept in last-access order, so idle users sit at the front: any
+# entry untouched for RATE_WINDOW has refilled completely and is dropped,
+# and past MAX_TRACKED_USERS the least recently seen user is evicted.
+# A dropped user simply starts again with a full bucket.
+_rate_limits: "OrderedDict[int, Tuple[float, float]]" = OrderedDict()
+
+# With REDIS_ENABLED the bucket lives in Redis instead, so every bot
+# process draws from the same per-user budget. The script refills and
+# takes a token in one atomic round trip, using the Redis clock so all
+# processes agree on elapsed time; idle keys expire once fully refilled.
+try:
+    from redis import asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local tokens = tonumber(state[1]) or capacity
+local last = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last) * refill)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return allowed
+"""
+
+# Redis must answer fast or be skipped: a short socket timeout bounds the
+# wait per callback, and after a failure Redis is left alone for
+# REDIS_RETRY_AFTER seconds rather than retried on every button press.
+REDIS_TIMEOUT = 0.2
+REDIS_RETRY_AFTER = 30
+
+_redis_client = None
+_redis_bucket = None
+_redis_checked = False
+_redis_down_until = 0.0
+
+
+def _get_redis_bucket():
+    """Return the shared token-bucket script, or None if Redis is off."""
+    global _redis_client, _redis_bucket, _redis_checked
+    if not _redis_checked:
+        _redis_checked = True
+        from config.settings import get_settings
+        settings = get_settings()
+        if settings.redis_enabled:
+            if aioredis is None:
+                logger.warning("REDIS_ENABLED but redis is not installed, rate limits stay per-process")
+            else:
+                _redis_client = aioredis.from_url(
+                    settings.redis_url,
+                    socket_connect_timeout=REDIS_TIMEOUT,
+                    socket_timeout=REDIS_TIMEOUT,
+                )
+                _redis_bucket = _redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+    return _redis_bucket
+
+
+async def close_rate_limiter() -> None:
+    """Close the shared rate limiter's Redis connection, if one was opened."""
+    global _redis_client, _redis_bucket
+    if _redis_client is not None:
+        await _redis_client.aclose()
+        _redis_client = None
+        _redis_bucket = None
+
+
+def _evict_rate_limits(now: float) -> None:
+    """Drop idle (fully refilled) buckets, then enforce MAX_TRACKED_USERS."""
+    while _rate_limits:
+        _, last = next(iter(_rate_limits.values()))
+        if now - last < RATE_WINDOW:
+            break
+        _rate_limits.popitem(last=False)
+    while len(_rate_limits) > MAX_TRACKED_USERS:
+        _rate_limits.popitem(last=False)
+
+
+def _take_local_token(user_id: int) -> bool:
+    """Take a token from the in-process bucket for user_id."""
+    now = time.monotonic()
+
+    # Read-refill-write below has no await in it, so it runs atomically
+    # on the event loop; no lock (global or sharded) is needed
+    tokens, last = _rate_limits.get(user_id, (RATE_LIMIT, now))
+    tokens = min(RATE_LIMIT, tokens + (now - last) * RATE_REFILL)
+
+    allowed = tokens >= 1
+    _rate_limits[user_id] = (tokens - 1 if allowed else tokens, now)
+    _rate_limits.move_to_end(user_id)
+    _evict_rate_limits(now)
+    return allowed
+
+
+async def _take_shared_token(user_id: int) -> Optional[bool]:
+    """
+    Take a token from the Redis bucket for user_id.
+
+    Returns:
+        Whether the request is allowed, or None if Redis is disabled or
+        unreachable (caller falls back to the in-process bucket)
+    """
+    global _redis_down_until
+    bucket = _get_redis_bucket()
+    if bucket is None or time.monotonic() < _redis_down_until:
+        return None
+    try:
+        allowed = await bucket(
+            keys=[f"rate_limit:{user_id}"],
+            args=[RATE_LIMIT, RATE_REFILL, RATE_WINDOW],
+        )
+    except (RedisError, OSError) as e:
+        _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        logger.warning(f"Shared rate limiter unavailable, using local bucket for {REDIS_RETRY_AFTER}s: {e}")
+        return None
+    return bool(allowed)
 
 
 def rate_limit(func: Callable) -> Callable:
@@ -26,76 +155,111 @@ def rate_limit(func: Callable) -> Callable:
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
-        now = time.time()
 
-        # Clean old entries
-        _rate_limits[user_id] = [
-            t for t in _rate_limits[user_id]
-            if now - t < RATE_WINDOW
-        ]
+        allowed = await _take_shared_token(user_id)
+        if allowed is None:
+            allowed = _take_local_token(user_id)
 
-        if len(_rate_limits[user_id]) >= RATE_LIMIT:
+        if not allowed:
             await update.callback_query.answer(
                 "⚠️ Quá nhiều yêu cầu. Vui lòng đợi.",
                 show_alert=True
             )
             return
 
-        _rate_limits[user_id].append(now)
         return await func(update, context)
     return wrapper
 
-from database import get_db
+from database import get_db, count_queries
 from services import (
+    StaleTaskError,
     get_or_create_user,
     get_task_by_public_id,
     update_task_status,
     update_task_progress,
     update_task_content,
     update_task_deadline,
-    update_task_priority,
+    update_priority_if_owner,
     update_task_assignee,
     restore_task,
     parse_vietnamese_time,
-    get_user_by_username,
+    get_users_by_handles,
     bulk_delete_tasks,
+    bulk_soft_delete_tasks,
+    bulk_restore_tasks,
+    get_user_personal_tasks,
+    get_user_created_tasks,
+    get_user_received_tasks,
+    get_all_user_related_tasks,
+    is_group_task,
+    get_child_tasks,
+    convert_individual_to_group,
+    update_group_assignees,
+    create_task,
 )
+from services.notification import send_task_completed_to_assigner
 from utils import (
     MSG_TASK_RESTORED,
+    MSG_EDIT_MENU,
+    MSG_EDIT_CONTENT_PROMPT,
+    MSG_EDIT_DEADLINE_PROMPT,
+    MSG_EDIT_PRIORITY_MENU,
+    MSG_EDIT_GROUP_ASSIGNEE_PROMPT,
+    MSG_EDIT_ASSIGNEE_PROMPT,
     ERR_TASK_NOT_FOUND,
     ERR_NO_PERMISSION,
     ERR_UNDO_EXPIRED,
+    ERR_TASK_CHANGED,
     format_task_detail,
     format_datetime,
     format_priority,
     task_detail_keyboard,
     task_category_keyboard,
+    task_type_filter_keyboard,
     progress_keyboard,
     undo_keyboard,
     edit_menu_keyboard,
     edit_priority_keyboard,
+    confirm_keyboard,
+    task_list_with_pagination,
     mention_user,
 )
-from handlers.task_delete import process_delete, process_restore
+from handlers.statistics import handle_overdue_callback, handle_stats_callback
+from handlers.task_delete import (
+    UNDO_SECONDS,
+    process_delete,
+    process_restore,
+    start_undo_countdown,
+    cancel_undo_countdown,
+)
 
 logger = logging.getLogger(__name__)
 
 
 # Callback validation constants
-# Task ID pattern: P0001, G0001, etc.
-TASK_ID_PATTERN = re.compile(r'^[PG]\d{4,8}$')
+# Task IDs: P or G followed by 4-8 ASCII digits (P0001, G0001, etc.)
+TASK_ID_PREFIXES = ("P", "G")
+TASK_ID_MIN_LEN = 5
+TASK_ID_MAX_LEN = 9
 
 # Valid priorities
-VALID_PRIORITIES = {"low", "normal", "high", "urgent"}
+VALID_PRIORITIES = frozenset({"low", "normal", "high", "urgent"})
 
 # Valid list types
-VALID_LIST_TYPES = {"all", "personal", "assigned", "received"}
+VALID_LIST_TYPES = frozenset({"all", "personal", "assigned", "received"})
 
 # Valid filter types
-VALID_FILTER_TYPES = {"all", "individual", "group"}
+VALID_FILTER_TYPES = frozenset({"all", "individual", "group"})
 
 # Valid category types
-VALID_CATEGORIES = {"menu", "personal", "assigned", "received", "all"}
+VALID_CATEGORIES = frozenset({"menu", "personal", "assigned", "received", "all"})
+
+# Params kept after the action when splitting callback data
+CALLBACK_MAX_PARAMS = 3
+
+# Valid bulk delete types and confirmation actions
+VALID_BULK_DELETE_TYPES = frozenset({"all", "assigned"})
+VALID_BULK_DELETE_ACTIONS = frozenset({"confirm", "cancel"})
 
 
 def validate_task_id(task_id: str) -> Optional[str]:
@@ -113,10 +277,17 @@ def validate_task_id(task_id: str) -> Optional[str]:
 
     task_id = task_id.strip().upper()
 
-    if not TASK_ID_PATTERN.match(task_id):
-        return None
+    # Plain str checks instead of a regex: no match object per callback
+    digits = task_id[1:]
+    if (
+        TASK_ID_MIN_LEN <= len(task_id) <= TASK_ID_MAX_LEN
+        and task_id[0] in TASK_ID_PREFIXES
+        and digits.isascii()
+        and digits.isdigit()
+    ):
+        return task_id
 
-    return task_id
+    return None
 
 
 def validate_int(value: str, min_val: int = 0, max_val: int = 10000) -> Optional[int]:
@@ -194,227 +365,279 @@ def parse_callback_data(data: str) -> Tuple[str, list]:
     if len(data) > 200:
         return ("", [])
 
-    parts = data.split(":")
-    action = parts[0].strip().lower() if parts else ""
+    # Routes read at most two params; capping the split keeps those exact
+    # while any extra colons stay in the unread tail
+    action, sep, rest = data.partition(":")
+    params = rest.split(":", CALLBACK_MAX_PARAMS - 1) if sep else []
 
-    return (action, parts[1:])
+    return (action.strip().lower(), params)
 
 
-@rate_limit
-async def callback_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """
-    Route callback queries to appropriate handlers.
+# =============================================================================
+# Callback Routes
+# =============================================================================
+# Each route receives (update, context, db, db_user, params) with params
+# already split from the callback data; CALLBACK_ROUTES maps action -> route.
 
-    Callback data format: action:param1:param2:...
-    All parameters are validated before use.
-    """
+async def _require_task_id(query, value: str) -> Optional[str]:
+    """Validate a task ID param, telling the user when it is invalid."""
+    task_id = validate_task_id(value)
+    if not task_id:
+        await query.edit_message_text("Mã việc không hợp lệ.")
+    return task_id
+
+
+async def _require_undo_id(query, value: str) -> Optional[int]:
+    """Validate an undo ID param, telling the user when it is invalid."""
+    undo_id = validate_int(value, min_val=1)
+    if undo_id is None:
+        await query.edit_message_text("Dữ liệu không hợp lệ.")
+    return undo_id
+
+
+async def _route_task_complete(update, context, db, db_user, params) -> None:
     query = update.callback_query
-    await query.answer()
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_complete(query, db, db_user, task_id, context.bot)
 
-    data = query.data
 
-    # Parse and validate callback data
-    action, params = parse_callback_data(data)
+async def _route_task_progress(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_progress_menu(query, task_id)
 
-    # Handle special prefixes first (before main routing)
-    if data and data.startswith("overdue_"):
-        from handlers.statistics import handle_overdue_callback
-        await handle_overdue_callback(update, context)
+
+async def _route_progress(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = validate_task_id(params[0] if params else "")
+    value = validate_int(params[1] if len(params) > 1 else "", min_val=0, max_val=100)
+
+    if not task_id:
+        await query.edit_message_text("Mã việc không hợp lệ.")
+        return
+    if value is None:
+        await query.edit_message_text("Giá trị tiến độ phải từ 0-100.")
         return
 
-    if data and data.startswith("cal_"):
-        # Calendar callbacks handled elsewhere
+    await handle_progress_update(query, db, db_user, task_id, value)
+
+
+async def _route_task_detail(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_detail(query, db, db_user, task_id)
+
+
+async def _route_task_delete(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_delete_confirm(query, task_id)
+
+
+async def _route_confirm(update, context, db, db_user, params) -> None:
+    if len(params) >= 2 and params[0] == "delete":
+        query = update.callback_query
+        task_id = await _require_task_id(query, params[1])
+        if task_id:
+            await handle_delete(query, db, db_user, task_id, context.bot, context)
+
+
+async def _route_cancel(update, context, db, db_user, params) -> None:
+    await update.callback_query.edit_message_text("Đã huỷ.")
+
+
+async def _route_task_undo(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    undo_id = await _require_undo_id(query, params[0] if params else "")
+    if undo_id is not None:
+        await handle_undo(query, db, undo_id, context)
+
+
+async def _route_bulk_undo(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    undo_id = await _require_undo_id(query, params[0] if params else "")
+    if undo_id is not None:
+        await handle_bulk_undo(query, db, undo_id, context)
+
+
+async def _route_list(update, context, db, db_user, params) -> None:
+    list_type = validate_list_type(params[0] if params else "all")
+    page = validate_int(params[1] if len(params) > 1 else "1", min_val=1, max_val=1000) or 1
+    await handle_list_page(update.callback_query, db, db_user, list_type, page)
+
+
+async def _route_noop(update, context, db, db_user, params) -> None:
+    # Pagination display buttons
+    pass
+
+
+async def _route_task_edit(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_edit_menu(query, db, db_user, task_id)
+
+
+async def _route_edit_content(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_edit_content_prompt(query, db, db_user, task_id, context)
+
+
+async def _route_edit_deadline(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_edit_deadline_prompt(query, db, db_user, task_id, context)
+
+
+async def _route_edit_priority(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_edit_priority_menu(query, db, db_user, task_id)
+
+
+async def _route_set_priority(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = validate_task_id(params[0] if params else "")
+    priority = validate_priority(params[1] if len(params) > 1 else "")
+
+    if not task_id:
+        await query.edit_message_text("Mã việc không hợp lệ.")
+        return
+    if not priority:
+        await query.edit_message_text("Độ ưu tiên không hợp lệ.")
         return
 
-    try:
-        db = get_db()
-        user = update.effective_user
-        db_user = await get_or_create_user(db, user)
+    await handle_set_priority(query, db, db_user, task_id, priority)
 
-        # Task complete
-        if action == "task_complete":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_complete(query, db, db_user, task_id, context.bot)
 
-        # Task progress
-        elif action == "task_progress":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_progress_menu(query, task_id)
+async def _route_edit_assignee(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    task_id = await _require_task_id(query, params[0] if params else "")
+    if task_id:
+        await handle_edit_assignee_prompt(query, db, db_user, task_id, context)
 
-        # Progress update
-        elif action == "progress":
-            task_id = validate_task_id(params[0] if params else "")
-            value = validate_int(params[1] if len(params) > 1 else "", min_val=0, max_val=100)
 
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            if value is None:
-                await query.edit_message_text("Giá trị tiến độ phải từ 0-100.")
-                return
+async def _route_task_category(update, context, db, db_user, params) -> None:
+    category = params[0].lower() if params else "menu"
+    if category not in VALID_CATEGORIES:
+        category = "menu"
+    await handle_task_category(update.callback_query, db, db_user, category)
 
-            await handle_progress_update(query, db, db_user, task_id, value)
 
-        # Task detail
-        elif action == "task_detail":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_detail(query, db, db_user, task_id)
+async def _route_task_filter(update, context, db, db_user, params) -> None:
+    filter_type = params[0].lower() if params else "all"
+    if filter_type not in VALID_FILTER_TYPES:
+        filter_type = "all"
+    list_type = validate_list_type(params[1] if len(params) > 1 else "all")
+    await handle_task_filter(update.callback_query, db, db_user, filter_type, list_type)
 
-        # Task delete
-        elif action == "task_delete":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_delete_confirm(query, task_id)
-
-        # Confirm delete
-        elif action == "confirm":
-            if len(params) >= 2 and params[0] == "delete":
-                task_id = validate_task_id(params[1])
-                if not task_id:
-                    await query.edit_message_text("Mã việc không hợp lệ.")
-                    return
-                await handle_delete(query, db, db_user, task_id, context.bot, context)
 
-        # Cancel action
-        elif action == "cancel":
-            await query.edit_message_text("Đã huỷ.")
+async def _route_stats(update, context, db, db_user, params) -> None:
+    await handle_stats_callback(update, context)
 
-        # Undo delete
-        elif action == "task_undo":
-            undo_id = validate_int(params[0] if params else "", min_val=1)
-            if undo_id is None:
-                await query.edit_message_text("Dữ liệu không hợp lệ.")
-                return
-            await handle_undo(query, db, undo_id, context)
 
-        # Bulk undo delete
-        elif action == "bulk_undo":
-            undo_id = validate_int(params[0] if params else "", min_val=1)
-            if undo_id is None:
-                await query.edit_message_text("Dữ liệu không hợp lệ.")
-                return
-            await handle_bulk_undo(query, db, undo_id, context)
-
-        # List navigation
-        elif action == "list":
-            list_type = validate_list_type(params[0] if params else "all")
-            page = validate_int(params[1] if len(params) > 1 else "1", min_val=1, max_val=1000) or 1
-            await handle_list_page(query, db, db_user, list_type, page)
-
-        # No-op (for pagination display)
-        elif action == "noop":
-            pass
-
-        # Task edit menu
-        elif action == "task_edit":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_edit_menu(query, db, db_user, task_id)
+async def _route_bulk_delete(update, context, db, db_user, params) -> None:
+    query = update.callback_query
+    if len(params) < 2:
+        await query.edit_message_text("Dữ liệu không hợp lệ.")
+        return
 
-        # Edit content prompt
-        elif action == "edit_content":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_edit_content_prompt(query, db, db_user, task_id, context)
+    delete_type = params[0].lower()
+    confirm_action = params[1].lower()
 
-        # Edit deadline prompt
-        elif action == "edit_deadline":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_edit_deadline_prompt(query, db, db_user, task_id, context)
+    if delete_type not in VALID_BULK_DELETE_TYPES:
+        await query.edit_message_text("Loại xóa không hợp lệ.")
+        return
+    if confirm_action not in VALID_BULK_DELETE_ACTIONS:
+        await query.edit_message_text("Hành động không hợp lệ.")
+        return
 
-        # Edit priority menu
-        elif action == "edit_priority":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_edit_priority_menu(query, db, db_user, task_id)
+    await handle_bulk_delete(query, db, db_user, delete_type, confirm_action, context)
+
+
+# More queries than this in one callback usually means a per-row lookup loop
+CALLBACK_QUERY_BUDGET = 10
+
+CALLBACK_ROUTES = {
+    "task_complete": _route_task_complete,
+    "task_progress": _route_task_progress,
+    "progress": _route_progress,
+    "task_detail": _route_task_detail,
+    "task_delete": _route_task_delete,
+    "confirm": _route_confirm,
+    "cancel": _route_cancel,
+    "task_undo": _route_task_undo,
+    "bulk_undo": _route_bulk_undo,
+    "list": _route_list,
+    "noop": _route_noop,
+    "task_edit": _route_task_edit,
+    "edit_content": _route_edit_content,
+    "edit_deadline": _route_edit_deadline,
+    "edit_priority": _route_edit_priority,
+    "set_priority": _route_set_priority,
+    "edit_assignee": _route_edit_assignee,
+    "task_category": _route_task_category,
+    "task_filter": _route_task_filter,
+    "stats_weekly": _route_stats,
+    "stats_monthly": _route_stats,
+    "bulk_delete": _route_bulk_delete,
+}
 
-        # Set priority
-        elif action == "set_priority":
-            task_id = validate_task_id(params[0] if params else "")
-            priority = validate_priority(params[1] if len(params) > 1 else "")
 
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            if not priority:
-                await query.edit_message_text("Độ ưu tiên không hợp lệ.")
-                return
+@rate_limit
+async def callback_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Route callback queries to appropriate handlers.
 
-            await handle_set_priority(query, db, db_user, task_id, priority)
+    Callback data format: action:param1:param2:...
+    The action is looked up in CALLBACK_ROUTES; each route validates
+    its own parameters before use.
+    """
+    query = update.callback_query
+    await query.answer()
 
-        # Edit assignee prompt
-        elif action == "edit_assignee":
-            task_id = validate_task_id(params[0] if params else "")
-            if not task_id:
-                await query.edit_message_text("Mã việc không hợp lệ.")
-                return
-            await handle_edit_assignee_prompt(query, db, db_user, task_id, context)
-
-        # Task category menu
-        elif action == "task_category":
-            category = params[0].lower() if params else "menu"
-            if category not in VALID_CATEGORIES:
-                category = "menu"
-            await handle_task_category(query, db, db_user, category)
-
-        # Task type filter (Individual/Group)
-        elif action == "task_filter":
-            filter_type = params[0].lower() if params else "all"
-            if filter_type not in VALID_FILTER_TYPES:
-                filter_type = "all"
-            list_type = validate_list_type(params[1] if len(params) > 1 else "all")
-            await handle_task_filter(query, db, db_user, filter_type, list_type)
-
-        # Statistics callbacks
-        elif action in ("stats_weekly", "stats_monthly"):
-            from handlers.statistics import handle_stats_callback
-            await handle_stats_callback(update, context)
-
-        # Bulk delete callbacks
-        elif action == "bulk_delete":
-            if len(params) < 2:
-                await query.edit_message_text("Dữ liệu không hợp lệ.")
-                return
+    data = query.data
 
-            delete_type = params[0].lower()
-            confirm_action = params[1].lower()
+    # Handle special prefixes first (before main routing)
+    if data and data.startswith("overdue_"):
+        await handle_overdue_callback(update, context)
+        return
 
-            if delete_type not in {"all", "assigned"}:
-                await query.edit_message_text("Loại xóa không hợp lệ.")
-                return
-            if confirm_action not in {"confirm", "cancel"}:
-                await query.edit_message_text("Hành động không hợp lệ.")
-                return
+    if data and data.startswith("cal_"):
+        # Calendar callbacks handled elsewhere
+        return
 
-            await handle_bulk_delete(query, db, db_user, delete_type, confirm_action, context)
+    # Parse and validate callback data
+    action, params = parse_callback_data(data)
 
-        else:
-            if action:
-                logger.warning(f"Unknown callback action: {action}")
+    route = CALLBACK_ROUTES.get(action)
+    if route is None:
+        if action:
+            logger.warning(f"Unknown callback action: {action}")
+        return
+
+    try:
+        db = get_db()
+        with count_queries() as queries:
+            db_user = await get_or_create_user(db, update.effective_user)
+            await route(update, context, db, db_user, params)
+        if len(queries) > CALLBACK_QUERY_BUDGET:
+            logger.warning(f"Callback {action} ran {len(queries)} queries (budget {CALLBACK_QUERY_BUDGET})")
 
     except IndexError:
         logger.warning(f"Callback data missing params: {data}")
         await query.edit_message_text("Dữ liệu không đầy đủ.")
+    except StaleTaskError as e:
+        logger.info(f"Concurrent update on task {e.public_id}")
+        await query.edit_message_text(ERR_TASK_CHANGED.format(task_id=e.public_id))
     except Exception as e:
         logger.error(f"Error in callback_router: {e}")
         await query.edit_message_text("Lỗi hệ thống. Vui lòng thử lại.")
@@ -435,6 +658,9 @@ async def handle_complete(query, db, db_user, task_id: str, bot) -> None:
 
     # Update status
     updated_task = await update_task_status(db, task["id"], "completed", db_user["id"])
+    if not updated_task:
+        await query.edit_message_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+        return
 
     await query.edit_message_text(
         f"Đã hoàn thành việc {task_id}!\n\n"
@@ -442,7 +668,6 @@ async def handle_complete(query, db, db_user, task_id: str, bot) -> None:
     )
 
     # Notify task creator/assigner
-    from services.notification import send_task_completed_to_assigner
     await send_task_completed_to_assigner(bot, db, updated_task or task, db_user)
 
 
@@ -454,6 +679,12 @@ async def handle_progress_menu(query, task_id: str) -> None:
     )
 
 
+# Progress is validated to 0-100, so only 11 bars can ever be shown;
+# index by value // 10. Status is indexed by (value == 100).
+PROGRESS_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+PROGRESS_STATUS = ("Đang làm", "Hoàn thành!")
+
+
 async def handle_progress_update(query, db, db_user, task_id: str, value: int) -> None:
     """Handle progress update callback."""
     task = await get_task_by_public_id(db, task_id)
@@ -466,18 +697,14 @@ async def handle_progress_update(query, db, db_user, task_id: str, value: int) -
         await query.edit_message_text(ERR_NO_PERMISSION)
         return
 
-    await update_task_progress(db, task["id"], value, db_user["id"])
-
-    # Progress bar
-    filled = int(10 * value / 100)
-    bar = "█" * filled + "░" * (10 - filled)
-
-    status = "Hoàn thành!" if value == 100 else "Đang làm"
+    if not await update_task_progress(db, task["id"], value, db_user["id"]):
+        await query.edit_message_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+        return
 
     await query.edit_message_text(
         f"Cập nhật tiến độ <b>{task_id}</b>!\n\n"
-        f"{bar} {value}%\n"
-        f"<b>Trạng thái:</b> {status}",
+        f"{PROGRESS_BARS[value // 10]} {value}%\n"
+        f"<b>Trạng thái:</b> {PROGRESS_STATUS[value == 100]}",
         parse_mode="HTML",
     )
 
@@ -501,8 +728,6 @@ async def handle_detail(query, db, db_user, task_id: str) -> None:
 
 async def handle_delete_confirm(query, task_id: str) -> None:
     """Show delete confirmation."""
-    from utils import confirm_keyboard
-
     await query.edit_message_text(
         f"Xác nhận xóa việc {task_id}?",
         reply_markup=confirm_keyboard("delete", task_id),
@@ -515,119 +740,29 @@ async def handle_delete(query, db, db_user, task_id: str, bot, context=None) ->
 
     if success:
         undo_id = result
-        message = await query.edit_message_text(
+        text = (
             f"🗑️ Đã xóa việc {task_id}!\n\n"
-            f"Bấm nút bên dưới để hoàn tác.",
-            reply_markup=undo_keyboard(undo_id, 10),
+            f"Bấm nút bên dưới để hoàn tác."
         )
-
-        # Schedule countdown updates if context is available
-        if context and context.job_queue:
-            chat_id = query.message.chat_id
-            message_id = query.message.message_id
-
-            # Schedule countdown updates every second (10s -> 1s)
-            for seconds in range(9, 0, -1):
-                context.job_queue.run_once(
-                    countdown_update_job,
-                    when=10 - seconds,
-                    data={
-                        "chat_id": chat_id,
-                        "message_id": message_id,
-                        "task_id": task_id,
-                        "undo_id": undo_id,
-                        "seconds": seconds,
-                    },
-                    name=f"undo_countdown_{undo_id}_{seconds}",
-                )
-
-            # Schedule final expiry message at 10 seconds
-            context.job_queue.run_once(
-                countdown_expired_job,
-                when=10,
-                data={
-                    "chat_id": chat_id,
-                    "message_id": message_id,
-                    "task_id": task_id,
-                    "undo_id": undo_id,
-                },
-                name=f"undo_expired_{undo_id}",
+        await query.edit_message_text(text, reply_markup=undo_keyboard(undo_id, UNDO_SECONDS))
+
+        if context:
+            start_undo_countdown(
+                context.application,
+                query.message.chat_id,
+                query.message.message_id,
+                undo_id,
+                text=text,
+                expired_text=f"🗑️ Đã xóa việc {task_id}!\n\n⏰ Đã hết thời gian hoàn tác.",
+                keyboard=lambda seconds: undo_keyboard(undo_id, seconds),
             )
     else:
         await query.edit_message_text(result)
 
 
-async def countdown_update_job(context) -> None:
-    """Job to update undo button countdown."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    task_id = job_data["task_id"]
-    undo_id = job_data["undo_id"]
-    seconds = job_data["seconds"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip update
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"🗑️ Đã xóa việc {task_id}!\n\n"
-                 f"Bấm nút bên dưới để hoàn tác.",
-            reply_markup=undo_keyboard(undo_id, seconds),
-        )
-    except Exception as e:
-        # Message may have been modified by user clicking undo
-        logger.debug(f"Could not update countdown: {e}")
-
-
-async def countdown_expired_job(context) -> None:
-    """Job to handle undo expiry."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    task_id = job_data["task_id"]
-    undo_id = job_data["undo_id"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip expiry message
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"🗑️ Đã xóa việc {task_id}!\n\n"
-                 f"⏰ Đã hết thời gian hoàn tác.",
-        )
-    except Exception as e:
-        logger.debug(f"Could not update expired message: {e}")
-
-
 async def handle_undo(query, db, undo_id: int, context=None) -> None:
     """Handle undo deletion."""
-    # Cancel any pending countdown jobs (9s -> 1s)
-    if context and context.job_queue:
-        for seconds in range(9, 0, -1):
-            jobs = context.job_queue.get_jobs_by_name(f"undo_countdown_{undo_id}_{seconds}")
-            for job in jobs:
-                job.schedule_removal()
-        # Cancel expired job
-        expired_jobs = context.job_queue.get_jobs_by_name(f"undo_expired_{undo_id}")
-        for job in expired_jobs:
-            job.schedule_removal()
+    cancel_undo_countdown(undo_id)
 
     success, result = await process_restore(db, undo_id)
 
@@ -642,16 +777,7 @@ async def handle_undo(query, db, undo_id: int, context=None) -> None:
 
 async def handle_bulk_undo(query, db, undo_id: int, context=None) -> None:
     """Handle bulk undo deletion."""
-    from services import bulk_restore_tasks
-
-    # Cancel any pending countdown jobs
-    if context:
-        job_queue = context.application.job_queue if hasattr(context, 'application') else context.job_queue
-        if job_queue:
-            current_jobs = job_queue.jobs()
-            for job in current_jobs:
-                if job.name and f"bulk_undo_{undo_id}" in job.name:
-                    job.schedule_removal()
+    cancel_undo_countdown(undo_id)
 
     restored_count = await bulk_restore_tasks(db, undo_id)
 
@@ -668,14 +794,6 @@ async def handle_bulk_undo(query, db, undo_id: int, context=None) -> None:
 
 async def handle_list_page(query, db, db_user, list_type: str, page: int) -> None:
     """Handle list pagination."""
-    from services import (
-        get_user_personal_tasks,
-        get_user_created_tasks,
-        get_user_received_tasks,
-        get_all_user_related_tasks,
-    )
-    from utils import task_list_with_pagination
-
     page_size = 10
     offset = (page - 1) * page_size
 
@@ -712,41 +830,37 @@ async def handle_list_page(query, db, db_user, list_type: str, page: int) -> Non
     )
 
 
+# Category menu never varies per user, so it is built once at import.
+# PTB markup objects are immutable after construction and safe to share.
+CATEGORY_MENU_TEXT = (
+    "📋 CHỌN DANH MỤC VIỆC\n\n"
+    "📋 Việc cá nhân - Việc bạn tự tạo cho mình\n"
+    "📤 Việc đã giao - Việc bạn giao cho người khác\n"
+    "📥 Việc đã nhận - Việc người khác giao cho bạn\n"
+    "📊 Tất cả việc - Toàn bộ việc liên quan\n\n"
+    "🔍 Lọc theo loại: Cá nhân (P-ID) | Nhóm (G-ID)"
+)
+CATEGORY_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Việc cá nhân", callback_data="task_category:personal")],
+    [InlineKeyboardButton("📤 Việc đã giao", callback_data="task_category:assigned")],
+    [InlineKeyboardButton("📥 Việc đã nhận", callback_data="task_category:received")],
+    [InlineKeyboardButton("📊 Tất cả việc", callback_data="task_category:all")],
+    [
+        InlineKeyboardButton("👤 Lọc: Cá nhân", callback_data="task_filter:individual"),
+        InlineKeyboardButton("👥 Lọc: Nhóm", callback_data="task_filter:group"),
+    ],
+])
+
+
 async def handle_task_category(query, db, db_user, category: str) -> None:
     """Handle task category selection."""
-    from services import (
-        get_user_personal_tasks,
-        get_user_created_tasks,
-        get_user_received_tasks,
-        get_all_user_related_tasks,
-    )
-    from utils import task_list_with_pagination
-
     page_size = 10
 
     if category == "menu":
         # Show category menu with filter options
-        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("📋 Việc cá nhân", callback_data="task_category:personal")],
-            [InlineKeyboardButton("📤 Việc đã giao", callback_data="task_category:assigned")],
-            [InlineKeyboardButton("📥 Việc đã nhận", callback_data="task_category:received")],
-            [InlineKeyboardButton("📊 Tất cả việc", callback_data="task_category:all")],
-            [
-                InlineKeyboardButton("👤 Lọc: Cá nhân", callback_data="task_filter:individual"),
-                InlineKeyboardButton("👥 Lọc: Nhóm", callback_data="task_filter:group"),
-            ],
-        ])
-
         await query.edit_message_text(
-            "📋 CHỌN DANH MỤC VIỆC\n\n"
-            "📋 Việc cá nhân - Việc bạn tự tạo cho mình\n"
-            "📤 Việc đã giao - Việc bạn giao cho người khác\n"
-            "📥 Việc đã nhận - Việc người khác giao cho bạn\n"
-            "📊 Tất cả việc - Toàn bộ việc liên quan\n\n"
-            "🔍 Lọc theo loại: Cá nhân (P-ID) | Nhóm (G-ID)",
-            reply_markup=keyboard,
+            CATEGORY_MENU_TEXT,
+            reply_markup=CATEGORY_MENU_KEYBOARD,
         )
         return
 
@@ -786,12 +900,19 @@ async def handle_task_category(query, db, db_user, category: str) -> None:
     )
 
 
+# Filter rows depend only on the selected filter, so each variant is
+# built once here and reused on every page.
+TASK_FILTER_ROWS = {
+    filter_type: tuple(task_type_filter_keyboard(filter_type).inline_keyboard)
+    for filter_type in VALID_FILTER_TYPES
+}
+BACK_TO_CATEGORY_ROW = (
+    InlineKeyboardButton("« Quay lại danh mục", callback_data="task_category:menu"),
+)
+
+
 async def handle_task_filter(query, db, db_user, filter_type: str, list_type: str) -> None:
     """Handle task type filter (Individual/Group)."""
-    from services import get_all_user_related_tasks
-    from utils import task_type_filter_keyboard
-    from telegram import InlineKeyboardMarkup, InlineKeyboardButton
-
     # Map filter_type to task_type for SQL filtering
     task_type_map = {
         "individual": "individual",
@@ -812,16 +933,12 @@ async def handle_task_filter(query, db, db_user, filter_type: str, list_type: st
     else:
         title = "📊 TẤT CẢ VIỆC"
 
-    # Build filter buttons row
-    filter_kb = task_type_filter_keyboard(filter_type)
+    filter_rows = TASK_FILTER_ROWS[filter_type]
 
     if not tasks:
-        buttons = list(filter_kb.inline_keyboard) + [
-            [InlineKeyboardButton("« Quay lại danh mục", callback_data="task_category:menu")]
-        ]
         await query.edit_message_text(
             f"{title}\n\nKhông có việc nào trong danh mục này.",
-            reply_markup=InlineKeyboardMarkup(buttons),
+            reply_markup=InlineKeyboardMarkup([*filter_rows, BACK_TO_CATEGORY_ROW]),
         )
         return
 
@@ -836,9 +953,8 @@ async def handle_task_filter(query, db, db_user, filter_type: str, list_type: st
     task_buttons = []
     for task in tasks:
         task_id = task.get("public_id", "")
-        content = task.get("content", "")[:40]
-        if len(task.get("content", "")) > 40:
-            content += "..."
+        full = task.get("content", "")
+        content = full[:40] + ("..." if len(full) > 40 else "")
         task_buttons.append([
             InlineKeyboardButton(f"{task_id}: {content}", callback_data=f"task_detail:{task_id}")
         ])
@@ -851,13 +967,9 @@ async def handle_task_filter(query, db, db_user, filter_type: str, list_type: st
     task_buttons.append(nav_row)
 
     # Combine: filter row + task buttons + back button
-    all_buttons = list(filter_kb.inline_keyboard) + task_buttons + [
-        [InlineKeyboardButton("« Quay lại danh mục", callback_data="task_category:menu")]
-    ]
-
     await query.edit_message_text(
         msg,
-        reply_markup=InlineKeyboardMarkup(all_buttons),
+        reply_markup=InlineKeyboardMarkup([*filter_rows, *task_buttons, BACK_TO_CATEGORY_ROW]),
     )
 
 
@@ -877,12 +989,14 @@ async def handle_edit_menu(query, db, db_user, task_id: str) -> None:
     current_deadline = format_datetime(task.get("deadline")) if task.get("deadline") else "Không có"
     current_priority = format_priority(task.get("priority", "normal"))
 
+    content = task["content"]
     await query.edit_message_text(
-        f"✏️ <b>SỬA VIỆC {task_id}</b>\n\n"
-        f"📝 <b>Nội dung:</b> {task['content'][:100]}{'...' if len(task['content']) > 100 else ''}\n"
-        f"📅 <b>Deadline:</b> {current_deadline}\n"
-        f"🔔 <b>Độ ưu tiên:</b> {current_priority}\n\n"
-        f"Chọn mục cần sửa:",
+        MSG_EDIT_MENU.format(
+            task_id=task_id,
+            content=content[:100] + ("..." if len(content) > 100 else ""),
+            deadline=current_deadline,
+            priority=current_priority,
+        ),
         reply_markup=edit_menu_keyboard(task_id),
         parse_mode="HTML",
     )
@@ -905,14 +1019,11 @@ async def handle_edit_content_prompt(query, db, db_user, task_id: str, context)
         "type": "content",
         "task_id": task_id,
         "task_db_id": task["id"],
+        "task": task,
     }
 
     await query.edit_message_text(
-        f"📝 SỬA NỘI DUNG {task_id}\n\n"
-        f"Nội dung hiện tại:\n{task['content']}\n\n"
-        f"Hãy gửi nội dung mới cho việc này.\n"
-        f"⚠️ REPLY tin nhắn này khi nhập (vuốt phải)\n"
-        f"(Gửi /huy để hủy)"
+        MSG_EDIT_CONTENT_PROMPT.format(task_id=task_id, content=task["content"])
     )
 
 
@@ -933,17 +1044,13 @@ async def handle_edit_deadline_prompt(query, db, db_user, task_id: str, context)
         "type": "deadline",
         "task_id": task_id,
         "task_db_id": task["id"],
+        "task": task,
     }
 
     current_deadline = format_datetime(task.get("deadline")) if task.get("deadline") else "Không có"
 
     await query.edit_message_text(
-        f"📅 SỬA DEADLINE {task_id}\n\n"
-        f"Deadline hiện tại: {current_deadline}\n\n"
-        f"Hãy gửi deadline mới.\n"
-        f"Ví dụ: ngày mai 9h, thứ 6, 25/12, cuối tuần\n\n"
-        f"⚠️ REPLY tin nhắn này khi nhập (vuốt phải)\n"
-        f"(Gửi /huy để hủy, gửi 'xóa' để xóa deadline)"
+        MSG_EDIT_DEADLINE_PROMPT.format(task_id=task_id, deadline=current_deadline)
     )
 
 
@@ -962,27 +1069,24 @@ async def handle_edit_priority_menu(query, db, db_user, task_id: str) -> None:
     current_priority = format_priority(task.get("priority", "normal"))
 
     await query.edit_message_text(
-        f"🔔 SỬA ĐỘ ƯU TIÊN {task_id}\n\n"
-        f"Độ ưu tiên hiện tại: {current_priority}\n\n"
-        f"Chọn độ ưu tiên mới:",
+        MSG_EDIT_PRIORITY_MENU.format(task_id=task_id, priority=current_priority),
         reply_markup=edit_priority_keyboard(task_id),
     )
 
 
 async def handle_set_priority(query, db, db_user, task_id: str, priority: str) -> None:
     """Set task priority."""
-    task = await get_task_by_public_id(db, task_id)
+    # Only the creator can edit; the check happens inside the UPDATE
+    task = await update_priority_if_owner(db, task_id, priority, db_user["id"])
 
     if not task:
-        await query.edit_message_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
-        return
-
-    if task["creator_id"] != db_user["id"]:
-        await query.edit_message_text(ERR_NO_PERMISSION)
+        # Error path only: tell "missing" apart from "not yours"
+        if await get_task_by_public_id(db, task_id):
+            await query.edit_message_text(ERR_NO_PERMISSION)
+        else:
+            await query.edit_message_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
         return
 
-    await update_task_priority(db, task["id"], priority, db_user["id"])
-
     priority_text = format_priority(priority)
 
     await query.edit_message_text(
@@ -993,9 +1097,13 @@ async def handle_set_priority(query, db, db_user, task_id: str, priority: str) -
 
 async def handle_edit_assignee_prompt(query, db, db_user, task_id: str, context) -> None:
     """Prompt user to enter new assignee(s)."""
-    from services import is_group_task, get_child_tasks
-
-    task = await get_task_by_public_id(db, task_id)
+    is_group = is_group_task(task_id)
+    children = []
+    # One pooled connection for the task and (for G-IDs) its children
+    async with db.acquire() as conn:
+        task = await get_task_by_public_id(db, task_id, conn=conn)
+        if task and is_group and task["creator_id"] == db_user["id"]:
+            children = await get_child_tasks(db, task_id, conn=conn)
 
     if not task:
         await query.edit_message_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
@@ -1005,20 +1113,18 @@ async def handle_edit_assignee_prompt(query, db, db_user, task_id: str, context)
         await query.edit_message_text(ERR_NO_PERMISSION)
         return
 
-    is_group = await is_group_task(db, task_id)
-
     # Store pending edit in user_data
     context.user_data["pending_edit"] = {
         "type": "assignee",
         "task_id": task_id,
         "task_db_id": task["id"],
+        "task": task,
         "is_group": is_group,
     }
     logger.info(f"Set pending_edit for assignee: task_id={task_id}, user_id={db_user['id']}")
 
     if is_group:
-        # Get current assignees for group task with @username mentions
-        children = await get_child_tasks(db, task_id)
+        # Current assignees for group task with @username mentions
         assignee_mentions = []
         for c in children:
             username = c.get("assignee_username")
@@ -1029,44 +1135,51 @@ async def handle_edit_assignee_prompt(query, db, db_user, task_id: str, context)
                 assignee_mentions.append(name)
         current_assignees = ", ".join(assignee_mentions)
         await query.edit_message_text(
-            f"👥 SỬA NGƯỜI NHẬN VIỆC NHÓM {task_id}\n\n"
-            f"Người nhận hiện tại:\n{current_assignees}\n\n"
-            f"📝 Nhập danh sách người nhận mới (cách nhau bằng dấu phẩy):\n"
-            f"Ví dụ: @user1, @user2, @user3\n\n"
-            f"💡 Nhập 1 người để chuyển thành việc cá nhân\n"
-            f"⚠️ REPLY tin nhắn này khi nhập (vuốt phải)\n"
-            f"(Gửi /huy để hủy)"
+            MSG_EDIT_GROUP_ASSIGNEE_PROMPT.format(task_id=task_id, assignees=current_assignees)
         )
     else:
-        # Get username for individual task
-        assignee_info = await db.fetch_one(
-            "SELECT display_name, username FROM users WHERE id = $1",
-            task.get("assignee_id")
-        )
-        if assignee_info:
-            username = assignee_info.get("username")
-            name = assignee_info.get("display_name", "?")
+        # Assignee username/name come joined with the task row
+        if task.get("assignee_telegram_id"):
+            username = task.get("assignee_username")
+            name = task.get("assignee_name") or "?"
             current_assignee = f"@{username} ({name})" if username else name
         else:
             current_assignee = "Không rõ"
         await query.edit_message_text(
-            f"👤 SỬA NGƯỜI NHẬN {task_id}\n\n"
-            f"Người nhận hiện tại: {current_assignee}\n\n"
-            f"📝 Nhập người nhận mới:\n"
-            f"• 1 người: @username → việc cá nhân\n"
-            f"• Nhiều người: @user1, @user2 → việc nhóm\n\n"
-            f"⚠️ REPLY tin nhắn này khi nhập (vuốt phải)\n"
-            f"(Gửi /huy để hủy)"
+            MSG_EDIT_ASSIGNEE_PROMPT.format(task_id=task_id, assignee=current_assignee)
         )
 
 
+async def _notify_assignees(bot, assignees: list, editor_telegram_id: int, task: dict, db_user: dict) -> None:
+    """Tell each new assignee (except the editor) about the task, concurrently."""
+    text = (
+        f"📋 Bạn được giao việc!\n\n"
+        f"Nội dung: {task['content']}\n"
+        f"Từ: {db_user.get('display_name', 'N/A')}"
+    )
+    # Sends are independent, so their round trips overlap; one failure
+    # doesn't stop the rest
+    results = await asyncio.gather(
+        *(
+            bot.send_message(chat_id=a["telegram_id"], text=text)
+            for a in assignees
+            if a["telegram_id"] != editor_telegram_id
+        ),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Could not notify assignee: {result}")
+
+
 async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle text messages for pending edits (content/deadline)."""
     logger.info(f"handle_pending_edit called with text: {update.message.text[:50] if update.message and update.message.text else 'None'}")
     logger.info(f"user_data keys: {list(context.user_data.keys())}")
 
     pending = context.user_data.get("pending_edit")
-    logger.info(f"pending_edit value: {pending}")
+    if pending:
+        logger.info(f"pending_edit: type={pending['type']}, task_id={pending['task_id']}")
 
     if not pending:
         logger.info("No pending edit, returning")
@@ -1087,6 +1200,9 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
         task_id = pending["task_id"]
         task_db_id = pending["task_db_id"]
         edit_type = pending["type"]
+        # Row as read when the prompt was shown; the version check in the
+        # update raises StaleTaskError if it changed since
+        task = pending["task"]
 
         if edit_type == "content":
             # Update content
@@ -1094,7 +1210,10 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                 await update.message.reply_text("Nội dung quá ngắn. Vui lòng nhập ít nhất 3 ký tự.")
                 return
 
-            await update_task_content(db, task_db_id, text, db_user["id"])
+            if not await update_task_content(db, task_db_id, text, db_user["id"], current=task):
+                context.user_data.pop("pending_edit", None)
+                await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+                return
             context.user_data.pop("pending_edit", None)
 
             await update.message.reply_text(
@@ -1105,7 +1224,10 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
         elif edit_type == "deadline":
             # Handle remove deadline
             if text.lower() in ("xóa", "xoa", "remove", "clear"):
-                await update_task_deadline(db, task_db_id, None, db_user["id"])
+                if not await update_task_deadline(db, task_db_id, None, db_user["id"], current=task):
+                    context.user_data.pop("pending_edit", None)
+                    await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+                    return
                 context.user_data.pop("pending_edit", None)
                 await update.message.reply_text(f"✅ Đã xóa deadline của {task_id}!")
                 return
@@ -1119,7 +1241,10 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                 )
                 return
 
-            await update_task_deadline(db, task_db_id, deadline, db_user["id"])
+            if not await update_task_deadline(db, task_db_id, deadline, db_user["id"], current=task):
+                context.user_data.pop("pending_edit", None)
+                await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+                return
             context.user_data.pop("pending_edit", None)
 
             deadline_str = format_datetime(deadline)
@@ -1129,27 +1254,35 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
 
         elif edit_type == "assignee":
-            from services import convert_individual_to_group, update_group_assignees
-
             message = update.message
             assignees = []
+            seen_ids = set()  # ids already in assignees, so each user is added once
 
             # Method 1: Check message entities for text_mention (users without @username)
             if message.entities:
+                # One pass over the text for all @mentions (PTB converts the
+                # UTF-16 entity offsets), then one query to resolve them
+                mentions = {
+                    entity: mention[1:]
+                    for entity, mention in message.parse_entities([MessageEntity.MENTION]).items()
+                }
+                found_by_handle = await get_users_by_handles(db, list(mentions.values()))
                 for entity in message.entities:
                     if entity.type == "text_mention" and entity.user:
                         # User without @username - get or create from entity.user
                         mentioned_user = await get_or_create_user(db, entity.user)
-                        if not any(u["id"] == mentioned_user["id"] for u in assignees):
+                        if mentioned_user["id"] not in seen_ids:
+                            seen_ids.add(mentioned_user["id"])
                             assignees.append(mentioned_user)
                             logger.info(f"Edit assignee - Found text_mention: {entity.user.first_name} (id={entity.user.id})")
                     elif entity.type == "mention":
                         # @username mention
-                        full_text = message.text or ""
-                        username_with_at = full_text[entity.offset:entity.offset + entity.length]
-                        username = username_with_at.lstrip("@")
-                        found_user = await get_user_by_username(db, username)
-                        if found_user and not any(u["id"] == found_user["id"] for u in assignees):
+                        username = mentions[entity]
+                        found_user = found_by_handle.get(username)
+                        if found_user and not found_user["is_active"]:
+                            found_user = None
+                        if found_user and found_user["id"] not in seen_ids:
+                            seen_ids.add(found_user["id"])
                             assignees.append(found_user)
                             logger.info(f"Edit assignee - Found @mention: @{username} (id={found_user['id']})")
 
@@ -1159,22 +1292,14 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                 raw_inputs = [x for x in raw_inputs if x]  # Remove empty
                 not_found = []
 
+                found_by_handle = await get_users_by_handles(db, raw_inputs)
                 for inp in raw_inputs:
-                    found = None
-                    if inp.isdigit():
-                        found = await db.fetch_one(
-                            "SELECT id, display_name, telegram_id, username FROM users WHERE telegram_id = $1",
-                            int(inp)
-                        )
+                    found = found_by_handle.get(inp)
                     if not found:
-                        found = await db.fetch_one(
-                            "SELECT id, display_name, telegram_id, username FROM users WHERE LOWER(username) = LOWER($1)",
-                            inp
-                        )
-                    if found:
-                        assignees.append(dict(found))
-                    else:
                         not_found.append(inp)
+                    elif found["id"] not in seen_ids:
+                        seen_ids.add(found["id"])
+                        assignees.append(found)
 
                 if not_found:
                     await update.message.reply_text(
@@ -1191,35 +1316,27 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                 )
                 return
 
-            # Remove duplicates
-            seen_ids = set()
-            unique_assignees = []
-            for a in assignees:
-                if a["id"] not in seen_ids:
-                    seen_ids.add(a["id"])
-                    unique_assignees.append(a)
-            assignees = unique_assignees
-
             is_group = pending.get("is_group", False)
-            task = await get_task_by_public_id(db, task_id)
 
             if len(assignees) == 1:
                 # Single assignee - update or convert to individual
                 new_assignee = assignees[0]
 
                 if is_group:
-                    # Convert group to individual - soft delete group and children, create new P-ID
-                    from services import get_child_tasks, soft_delete_task
+                    # Only the creator may delete the group (as soft_delete_task checks)
+                    if task["creator_id"] != db_user["id"]:
+                        context.user_data.pop("pending_edit", None)
+                        await update.message.reply_text("Chỉ người tạo mới có quyền xóa việc này.")
+                        return
 
-                    children = await get_child_tasks(db, task_id)
-                    # Delete all children
-                    for child in children:
-                        await soft_delete_task(db, child["id"], db_user["id"])
-                    # Delete parent
-                    await soft_delete_task(db, task_db_id, db_user["id"])
+                    # Convert group to individual - soft delete group and children, create new P-ID
+                    # (children hang off parent_task_id, so one call covers them all)
+                    await bulk_soft_delete_tasks(
+                        db, [task_db_id], db_user["id"],
+                        note="Converted to individual task"
+                    )
 
                     # Create new individual task
-                    from services import create_task
                     new_task = await create_task(
                         db=db,
                         content=task["content"],
@@ -1238,7 +1355,10 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                     )
                 else:
                     # Simple update
-                    await update_task_assignee(db, task_db_id, new_assignee["id"], db_user["id"])
+                    if not await update_task_assignee(db, task_db_id, new_assignee["id"], db_user["id"], current=task):
+                        context.user_data.pop("pending_edit", None)
+                        await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+                        return
                     context.user_data.pop("pending_edit", None)
                     assignee_mention = mention_user(new_assignee)
                     await update.message.reply_text(
@@ -1248,16 +1368,7 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                     )
 
                 # Notify new assignee
-                if new_assignee["telegram_id"] != user.id:
-                    try:
-                        await context.bot.send_message(
-                            chat_id=new_assignee["telegram_id"],
-                            text=f"📋 Bạn được giao việc!\n\n"
-                                 f"Nội dung: {task['content']}\n"
-                                 f"Từ: {db_user.get('display_name', 'N/A')}"
-                        )
-                    except Exception as e:
-                        logger.warning(f"Could not notify assignee: {e}")
+                await _notify_assignees(context.bot, [new_assignee], user.id, task, db_user)
 
             else:
                 # Multiple assignees - convert to group or update group
@@ -1289,18 +1400,11 @@ async def handle_pending_edit(update: Update, context: ContextTypes.DEFAULT_TYPE
                     )
 
                 # Notify all assignees
-                for assignee in assignees:
-                    if assignee["telegram_id"] != user.id:
-                        try:
-                            await context.bot.send_message(
-                                chat_id=assignee["telegram_id"],
-                                text=f"📋 Bạn được giao việc!\n\n"
-                                     f"Nội dung: {task['content']}\n"
-                                     f"Từ: {db_user.get('display_name', 'N/A')}"
-                            )
-                        except Exception as e:
-                            logger.warning(f"Could not notify assignee: {e}")
+                await _notify_assignees(context.bot, assignees, user.id, task, db_user)
 
+    except StaleTaskError as e:
+        context.user_data.pop("pending_edit", None)
+        await update.message.reply_text(ERR_TASK_CHANGED.format(task_id=e.public_id))
     except Exception as e:
         logger.error(f"Error handling pending edit: {e}")
         await update.message.reply_text("Lỗi hệ thống. Vui lòng thử lại.")
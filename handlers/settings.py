@@ -17,7 +17,7 @@ from telegram.ext import (
 )
 
 from database import get_db
-from services.user_service import get_or_create_user
+from services.user_service import get_or_create_user, invalidate_cached_user
 from utils.db_utils import validate_user_setting_column, InvalidColumnError
 
 logger = logging.getLogger(__name__)
@@ -192,6 +192,7 @@ async def update_user_setting(db, telegram_id: int, column: str, value) -> None:
         f"UPDATE users SET {validated_column} = $1 WHERE telegram_id = $2",
         value, telegram_id
     )
+    invalidate_cached_user(telegram_id)
 
 
 # ============================================
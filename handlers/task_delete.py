@@ -3,8 +3,12 @@ Task Delete Handler
 Commands for deleting tasks with undo support
 """
 
+import asyncio
 import logging
+from typing import Callable, Dict, Optional
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, ConversationHandler
 
 from database import get_db
@@ -36,6 +40,116 @@ from utils import (
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# Undo Countdown
+# =============================================================================
+UNDO_SECONDS = 10
+
+# One countdown task per live undo button. Every undo handler cancels the
+# task before restoring, so a running countdown never needs to ask the
+# database whether its undo was used.
+_undo_countdowns: Dict[int, asyncio.Task] = {}
+
+
+def start_undo_countdown(
+    application,
+    chat_id: int,
+    message_id: int,
+    undo_id: int,
+    text: str,
+    expired_text: str,
+    keyboard: Callable[[int], InlineKeyboardMarkup],
+    parse_mode: Optional[str] = None,
+) -> None:
+    """
+    Tick the undo button down once per second, then show the expiry text.
+
+    Runs as a single task instead of one job per tick.
+
+    Args:
+        application: Telegram application (owns the task and bot)
+        chat_id: Chat of the undo message
+        message_id: Undo message ID
+        undo_id: Undo record ID
+        text: Message text shown while undo is available
+        expired_text: Message text once the window has passed
+        keyboard: Builds the undo keyboard for the seconds remaining
+        parse_mode: Parse mode for both texts
+    """
+    cancel_undo_countdown(undo_id)
+    _undo_countdowns[undo_id] = application.create_task(
+        _run_undo_countdown(
+            application.bot, chat_id, message_id, undo_id,
+            text, expired_text, keyboard, parse_mode,
+        )
+    )
+
+
+def cancel_undo_countdown(undo_id: int) -> None:
+    """Stop the countdown for an undo that has just been used."""
+    task = _undo_countdowns.pop(undo_id, None)
+    if task:
+        task.cancel()
+
+
+async def _run_undo_countdown(
+    bot,
+    chat_id: int,
+    message_id: int,
+    undo_id: int,
+    text: str,
+    expired_text: str,
+    keyboard: Callable[[int], InlineKeyboardMarkup],
+    parse_mode: Optional[str],
+) -> None:
+    """Countdown task body started by start_undo_countdown."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # The message was sent with the full countdown already showing
+    last_markup = keyboard(UNDO_SECONDS)
+    try:
+        for elapsed in range(1, UNDO_SECONDS + 1):
+            # Sleep to the next whole second since start, so edits don't drift
+            await asyncio.sleep(max(0.0, started + elapsed - loop.time()))
+            try:
+                seconds = UNDO_SECONDS - elapsed
+                if seconds:
+                    markup = keyboard(seconds)
+                    # Skip the round trip when the rendered button is unchanged
+                    if markup == last_markup:
+                        continue
+                    await bot.edit_message_text(
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        text=text,
+                        reply_markup=markup,
+                        parse_mode=parse_mode,
+                    )
+                    last_markup = markup
+                else:
+                    await bot.edit_message_text(
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        text=expired_text,
+                        parse_mode=parse_mode,
+                    )
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    # Already showing this payload; treat the edit as sent
+                    if seconds:
+                        last_markup = markup
+                    continue
+                # Message was deleted or replaced; nothing left to count down
+                logger.debug(f"Stopping undo countdown {undo_id}: {e}")
+                return
+            except Exception as e:
+                # Message may have been modified by user clicking undo
+                logger.debug(f"Could not update undo countdown {undo_id}: {e}")
+    finally:
+        if _undo_countdowns.get(undo_id) is asyncio.current_task():
+            del _undo_countdowns[undo_id]
+
+
 # =============================================================================
 # Delete Menu Keyboards
 # =============================================================================
@@ -324,48 +438,21 @@ async def delete_confirm_callback(update: Update, context: ContextTypes.DEFAULT_
 
         if success:
             undo_id = result
-            await query.edit_message_text(
+            text = (
                 f"✅ Đã xóa việc {task_id}.\n\n"
-                f"Bấm nút bên dưới để hoàn tác:",
-                reply_markup=undo_keyboard(undo_id, 10),
+                f"Bấm nút bên dưới để hoàn tác:"
+            )
+            await query.edit_message_text(text, reply_markup=undo_keyboard(undo_id, UNDO_SECONDS))
+
+            start_undo_countdown(
+                context.application,
+                query.message.chat_id,
+                query.message.message_id,
+                undo_id,
+                text=text,
+                expired_text=f"🗑️ Đã xóa việc {task_id}!\n\n⏰ Đã hết thời gian hoàn tác.",
+                keyboard=lambda seconds: undo_keyboard(undo_id, seconds),
             )
-
-            # Schedule countdown updates
-            chat_id = query.message.chat_id
-            message_id = query.message.message_id
-
-            # Get job_queue from application
-            job_queue = context.application.job_queue
-
-            if job_queue:
-
-                # Schedule countdown updates every second (9s -> 1s)
-                for seconds in range(9, 0, -1):
-                    job_queue.run_once(
-                        _countdown_update_job,
-                        when=10 - seconds,
-                        data={
-                            "chat_id": chat_id,
-                            "message_id": message_id,
-                            "task_id": task_id,
-                            "undo_id": undo_id,
-                            "seconds": seconds,
-                        },
-                        name=f"undo_countdown_{undo_id}_{seconds}",
-                    )
-
-                # Schedule final expiry at 10 seconds
-                job_queue.run_once(
-                    _countdown_expired_job,
-                    when=10,
-                    data={
-                        "chat_id": chat_id,
-                        "message_id": message_id,
-                        "task_id": task_id,
-                        "undo_id": undo_id,
-                    },
-                    name=f"undo_expired_{undo_id}",
-                )
         else:
             await query.edit_message_text(f"❌ {result}")
 
@@ -374,124 +461,6 @@ async def delete_confirm_callback(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text(ERR_DATABASE)
 
 
-async def _countdown_update_job(context) -> None:
-    """Job to update undo button countdown."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    task_id = job_data["task_id"]
-    undo_id = job_data["undo_id"]
-    seconds = job_data["seconds"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip update
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"✅ Đã xóa việc {task_id}.\n\n"
-                 f"Bấm nút bên dưới để hoàn tác:",
-            reply_markup=undo_keyboard(undo_id, seconds),
-        )
-    except Exception as e:
-        logger.debug(f"Could not update countdown: {e}")
-
-
-async def _countdown_expired_job(context) -> None:
-    """Job to handle undo expiry."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    task_id = job_data["task_id"]
-    undo_id = job_data["undo_id"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip expiry message
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"🗑️ Đã xóa việc {task_id}!\n\n"
-                 f"⏰ Đã hết thời gian hoàn tác.",
-        )
-    except Exception as e:
-        logger.debug(f"Could not update expired message: {e}")
-
-
-async def _bulk_countdown_update_job(context) -> None:
-    """Job to update bulk undo button countdown."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    count = job_data["count"]
-    undo_id = job_data["undo_id"]
-    seconds = job_data["seconds"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip update
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"✅ Đã xóa <b>{count}</b> việc.\n\n"
-                 f"Bấm nút bên dưới để hoàn tác:",
-            reply_markup=bulk_undo_keyboard(undo_id, count, seconds),
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        logger.debug(f"Could not update bulk countdown: {e}")
-
-
-async def _bulk_countdown_expired_job(context) -> None:
-    """Job to handle bulk undo expiry."""
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    message_id = job_data["message_id"]
-    count = job_data["count"]
-    undo_id = job_data["undo_id"]
-
-    try:
-        # Check if undo was already performed
-        db = get_db()
-        undo_record = await db.fetch_one(
-            "SELECT is_restored FROM deleted_tasks_undo WHERE id = $1",
-            undo_id
-        )
-        if not undo_record or undo_record["is_restored"]:
-            return  # Undo already performed, skip expiry message
-
-        await context.bot.edit_message_text(
-            chat_id=chat_id,
-            message_id=message_id,
-            text=f"🗑️ Đã xóa <b>{count}</b> việc!\n\n"
-                 f"⏰ Đã hết thời gian hoàn tác.",
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        logger.debug(f"Could not update bulk expired message: {e}")
-
-
 async def bulk_undo_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle bulk undo button click."""
     query = update.callback_query
@@ -505,19 +474,13 @@ async def bulk_undo_callback(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.edit_message_text("❌ Lỗi: ID không hợp lệ.")
         return
 
+    cancel_undo_countdown(undo_id)
+
     try:
         db = get_db()
         restored_count = await bulk_restore_tasks(db, undo_id)
 
         if restored_count > 0:
-            # Cancel any scheduled jobs for this undo
-            job_queue = context.application.job_queue
-            if job_queue:
-                current_jobs = job_queue.jobs()
-                for job in current_jobs:
-                    if job.name and f"bulk_undo_{undo_id}" in job.name:
-                        job.schedule_removal()
-
             await query.edit_message_text(
                 f"↩️ Đã hoàn tác xóa <b>{restored_count}</b> việc!",
                 parse_mode="HTML",
@@ -597,47 +560,26 @@ async def delete_all_confirm_callback(update: Update, context: ContextTypes.DEFA
         context.user_data.pop("delete_tasks", None)
         context.user_data.pop("delete_category", None)
 
-        await query.edit_message_text(
+        text = (
             f"✅ Đã xóa <b>{count}</b> việc.\n\n"
-            f"Bấm nút bên dưới để hoàn tác:",
-            reply_markup=bulk_undo_keyboard(undo_id, count, 10),
+            f"Bấm nút bên dưới để hoàn tác:"
+        )
+        await query.edit_message_text(
+            text,
+            reply_markup=bulk_undo_keyboard(undo_id, count, UNDO_SECONDS),
             parse_mode="HTML",
         )
 
-        # Schedule countdown updates
-        chat_id = query.message.chat_id
-        message_id = query.message.message_id
-
-        job_queue = context.application.job_queue
-
-        if job_queue:
-            # Schedule countdown updates every second (9s -> 1s)
-            for seconds in range(9, 0, -1):
-                job_queue.run_once(
-                    _bulk_countdown_update_job,
-                    when=10 - seconds,
-                    data={
-                        "chat_id": chat_id,
-                        "message_id": message_id,
-                        "count": count,
-                        "undo_id": undo_id,
-                        "seconds": seconds,
-                    },
-                    name=f"bulk_undo_countdown_{undo_id}_{seconds}",
-                )
-
-            # Schedule final expiry at 10 seconds
-            job_queue.run_once(
-                _bulk_countdown_expired_job,
-                when=10,
-                data={
-                    "chat_id": chat_id,
-                    "message_id": message_id,
-                    "count": count,
-                    "undo_id": undo_id,
-                },
-                name=f"bulk_undo_expired_{undo_id}",
-            )
+        start_undo_countdown(
+            context.application,
+            query.message.chat_id,
+            query.message.message_id,
+            undo_id,
+            text=text,
+            expired_text=f"🗑️ Đã xóa <b>{count}</b> việc!\n\n⏰ Đã hết thời gian hoàn tác.",
+            keyboard=lambda seconds: bulk_undo_keyboard(undo_id, count, seconds),
+            parse_mode="HTML",
+        )
 
     except Exception as e:
         logger.error(f"Error in delete_all_confirm_callback: {e}")
@@ -663,8 +605,8 @@ async def process_delete(
     if not task:
         return False, ERR_TASK_NOT_FOUND.format(task_id=task_id)
 
-    # Soft delete
-    undo = await soft_delete_task(db, task["id"], user_id)
+    # Soft delete (reuses the row just read instead of fetching it again)
+    undo = await soft_delete_task(db, task["id"], user_id, current=task)
 
     if not undo:
         return False, "Lỗi khi xóa việc."
@@ -672,13 +614,9 @@ async def process_delete(
     # Notify assignee if different from creator
     if task["assignee_id"] != task["creator_id"]:
         try:
-            assignee = await db.fetch_one(
-                "SELECT telegram_id FROM users WHERE id = $1",
-                task["assignee_id"]
-            )
-            if assignee:
+            if task["assignee_telegram_id"]:
                 await bot.send_message(
-                    chat_id=assignee["telegram_id"],
+                    chat_id=task["assignee_telegram_id"],
                     text=f"Việc {task_id} đã bị xóa bởi người tạo.\n\n"
                          f"Nội dung: {task['content'][:50]}...",
                 )
@@ -10,6 +10,7 @@ from telegram.ext import ContextTypes, CommandHandler
 
 from database import get_db
 from services import (
+    StaleTaskError,
     get_or_create_user,
     get_task_by_public_id,
     get_task_by_id,
@@ -23,6 +24,7 @@ from utils import (
     ERR_TASK_NOT_FOUND,
     ERR_NO_PERMISSION,
     ERR_ALREADY_COMPLETED,
+    ERR_TASK_CHANGED,
     ERR_DATABASE,
     format_datetime,
     progress_keyboard,
@@ -74,9 +76,16 @@ async def xong_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                 continue
 
             # Update status
-            updated = await update_task_status(
-                db, task["id"], "completed", db_user["id"]
-            )
+            try:
+                updated = await update_task_status(
+                    db, task["id"], "completed", db_user["id"]
+                )
+            except StaleTaskError:
+                results.append(f"{task_id}: Vừa được người khác cập nhật, thử lại")
+                continue
+            if not updated:
+                results.append(f"{task_id}: Không tồn tại")
+                continue
 
             results.append(f"{task_id}: Hoàn thành!")
 
@@ -126,14 +135,10 @@ async def xong_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                         parent_task = await get_task_by_public_id(db, group_task_id)
 
                         if parent_task and parent_task["creator_id"] != db_user["id"]:
-                            creator = await db.fetch_one(
-                                "SELECT telegram_id FROM users WHERE id = $1",
-                                parent_task["creator_id"]
-                            )
-                            if creator:
+                            if parent_task["creator_telegram_id"]:
                                 user_mention = mention_user(db_user)
                                 await context.bot.send_message(
-                                    chat_id=creator["telegram_id"],
+                                    chat_id=parent_task["creator_telegram_id"],
                                     text=f"📊 *CẬP NHẬT TIẾN ĐỘ VIỆC NHÓM*\n\n"
                                          f"📋 *{group_task_id}*: {parent_task['content']}\n\n"
                                          f"✅ {progress_info['completed']}/{progress_info['total']} người đã hoàn thành\\!\n"
@@ -202,7 +207,11 @@ async def danglam_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             if task["assignee_id"] != db_user["id"]:
                 continue
 
-            await update_task_status(db, task["id"], "in_progress", db_user["id"])
+            try:
+                if not await update_task_status(db, task["id"], "in_progress", db_user["id"]):
+                    continue
+            except StaleTaskError:
+                continue
             updated_count += 1
 
         if updated_count > 0:
@@ -267,6 +276,9 @@ async def tiendo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             updated = await update_task_progress(
                 db, task["id"], progress, db_user["id"]
             )
+            if not updated:
+                await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
+                return
 
             # Format response with progress bar
             bar = progress_bar(progress)
@@ -309,6 +321,8 @@ async def tiendo_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 reply_markup=progress_keyboard(task_id),
             )
 
+    except StaleTaskError as e:
+        await update.message.reply_text(ERR_TASK_CHANGED.format(task_id=e.public_id))
     except Exception as e:
         logger.error(f"Error in tiendo_command: {e}")
         await update.message.reply_text(ERR_DATABASE)
@@ -118,18 +118,27 @@ async def xemviec_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         # Check if task ID provided
         if context.args:
             task_id = context.args[0].upper()
-            task = await get_task_by_public_id(db, task_id)
+            parent = None
+            # One pooled connection for all reads; released before replying
+            async with db.acquire() as conn:
+                task = await get_task_by_public_id(db, task_id, conn=conn)
+                if task and is_group_task(task_id):
+                    # Get aggregated progress
+                    progress_info = await get_group_task_progress(db, task_id, conn=conn)
+                    child_tasks = await get_child_tasks(db, task_id, conn=conn)
+                elif task and task_id.startswith("P-") and task.get("parent_task_id"):
+                    parent = await db.fetch_one_on(
+                        conn,
+                        "SELECT public_id FROM tasks WHERE id = $1",
+                        task["parent_task_id"]
+                    )
 
             if not task:
                 await update.message.reply_text(ERR_TASK_NOT_FOUND.format(task_id=task_id))
                 return
 
             # Check if this is a group task (G-ID)
-            if await is_group_task(db, task_id):
-                # Get aggregated progress
-                progress_info = await get_group_task_progress(db, task_id)
-                child_tasks = await get_child_tasks(db, task_id)
-
+            if is_group_task(task_id):
                 can_edit = task["creator_id"] == db_user["id"]
 
                 msg = format_group_task_detail(task, progress_info, child_tasks)
@@ -144,13 +153,8 @@ async def xemviec_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
                 msg = format_task_detail(task)
 
                 # Add parent task reference for P-ID tasks
-                if task_id.startswith("P-") and task.get("parent_task_id"):
-                    parent = await db.fetch_one(
-                        "SELECT public_id FROM tasks WHERE id = $1",
-                        task["parent_task_id"]
-                    )
-                    if parent:
-                        msg += f"\n\n👥 Thuộc việc nhóm: {parent['public_id']}"
+                if parent:
+                    msg += f"\n\n👥 Thuộc việc nhóm: {parent['public_id']}"
 
                 keyboard = task_detail_keyboard(
                     task_id,
@@ -23,6 +23,7 @@ from database import get_db
 from services import (
     get_or_create_user,
     get_user_by_id,
+    get_users_by_ids,
     get_user_by_username,
     create_task,
     create_group_task,
@@ -729,11 +730,7 @@ async def confirm_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 
             else:
                 # Multiple assignees - fetch user objects and create group task
-                assignees = []
-                for aid in assignee_ids:
-                    assignee = await get_user_by_id(db, aid)
-                    if assignee:
-                        assignees.append(assignee)
+                assignees = await get_users_by_ids(db, assignee_ids)
 
                 if not assignees:
                     await query.edit_message_text("Không tìm thấy người nhận.")
@@ -1575,11 +1572,7 @@ async def assign_confirm_callback(update: Update, context: ContextTypes.DEFAULT_
 
             else:
                 # Multiple assignees - fetch user objects and create group task
-                assignees = []
-                for aid in assignee_ids:
-                    assignee = await get_user_by_id(db, aid)
-                    if assignee:
-                        assignees.append(assignee)
+                assignees = await get_users_by_ids(db, assignee_ids)
 
                 if not assignees:
                     await query.edit_message_text("Không tìm thấy người nhận.")
@@ -4,7 +4,7 @@ APScheduler-based reminder system for task deadlines
 """
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -16,6 +16,10 @@ logger = logging.getLogger(__name__)
 
 TZ = pytz.timezone("Asia/Ho_Chi_Minh")
 
+# Soft-deleted tasks older than this move to tasks_archive
+ARCHIVE_AFTER = timedelta(days=30)
+ARCHIVE_BATCH_SIZE = 1000
+
 
 class ReminderScheduler:
     """Manages scheduled reminders for tasks."""
@@ -62,6 +66,22 @@ class ReminderScheduler:
             replace_existing=True,
         )
 
+        # Keep task_history partitions created ahead of time, daily at 03:00
+        self.scheduler.add_job(
+            self._create_history_partitions,
+            CronTrigger(hour=3, minute=0),
+            id="create_history_partitions",
+            replace_existing=True,
+        )
+
+        # Move long-deleted tasks to tasks_archive, daily at 03:30
+        self.scheduler.add_job(
+            self._archive_deleted_tasks,
+            CronTrigger(hour=3, minute=30),
+            id="archive_deleted_tasks",
+            replace_existing=True,
+        )
+
         self.scheduler.start()
         logger.info("Reminder scheduler started")
 
@@ -94,15 +114,43 @@ class ReminderScheduler:
     async def _cleanup_expired_undo(self) -> None:
         """Clean up expired undo records."""
         try:
+            # Restored records are dead once their window has passed too;
+            # purging them keeps the table (and its index) bounded.
             await self.db.execute(
                 """
                 DELETE FROM deleted_tasks_undo
-                WHERE expires_at < CURRENT_TIMESTAMP AND is_restored = false
+                WHERE expires_at < CURRENT_TIMESTAMP
                 """
             )
         except Exception as e:
             logger.error(f"Error cleaning up undo records: {e}")
 
+    async def _create_history_partitions(self) -> None:
+        """Create upcoming monthly task_history partitions."""
+        try:
+            created = await self.db.fetch_val("SELECT create_task_history_partitions()")
+            if created:
+                logger.info(f"Created {created} task_history partitions")
+        except Exception as e:
+            logger.error(f"Error creating task_history partitions: {e}")
+
+    async def _archive_deleted_tasks(self) -> None:
+        """Move soft-deleted tasks past their retention into tasks_archive."""
+        try:
+            total = 0
+            while True:
+                moved = await self.db.fetch_val(
+                    "SELECT archive_deleted_tasks($1, $2)",
+                    ARCHIVE_AFTER, ARCHIVE_BATCH_SIZE
+                )
+                total += moved or 0
+                if not moved or moved < ARCHIVE_BATCH_SIZE:
+                    break
+            if total:
+                logger.info(f"Archived {total} deleted tasks")
+        except Exception as e:
+            logger.error(f"Error archiving deleted tasks: {e}")
+
     async def _process_recurring_templates(self) -> None:
         """Process recurring templates and generate tasks."""
         from services.recurring_service import get_due_templates, generate_task_from_template
@@ -88,6 +88,9 @@ class ReportScheduler:
         users = await get_active_users_for_report(self.db, "weekly")
         logger.info(f"Sending weekly reports to {len(users)} users")
 
+        # Group rankings are the same for every member; load each group once
+        rankings_by_group = {}
+
         success_count = 0
         for user in users:
             try:
@@ -107,9 +110,12 @@ class ReportScheduler:
                 # Get ranking in each group
                 group_rankings = {}
                 for group in groups:
-                    rankings = await get_group_rankings(
-                        self.db, group["id"], "weekly", week_start
-                    )
+                    rankings = rankings_by_group.get(group["id"])
+                    if rankings is None:
+                        rankings = await get_group_rankings(
+                            self.db, group["id"], "weekly", week_start
+                        )
+                        rankings_by_group[group["id"]] = rankings
                     for i, r in enumerate(rankings):
                         if r["user_id"] == user["id"]:
                             group_rankings[group["title"]] = (i + 1, len(rankings))
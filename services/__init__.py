@@ -17,9 +17,13 @@ from .time_parser import (
 
 from .user_service import (
     get_or_create_user,
+    enable_user_cache,
+    invalidate_cached_user,
     get_user_by_telegram_id,
     get_user_by_id,
+    get_users_by_ids,
     get_user_by_username,
+    get_users_by_handles,
     find_users_by_mention,
     update_user_settings,
     get_or_create_group,
@@ -27,6 +31,7 @@ from .user_service import (
 )
 
 from .task_service import (
+    StaleTaskError,
     generate_task_id,
     create_task,
     get_task_by_public_id,
@@ -42,10 +47,12 @@ from .task_service import (
     update_task_content,
     update_task_deadline,
     update_task_priority,
+    update_priority_if_owner,
     update_task_assignee,
     soft_delete_task,
     restore_task,
     add_task_history,
+    add_task_history_many,
     create_default_reminders,
     get_tasks_with_deadline,
     # Group task functions (G-ID/P-ID system)
@@ -60,6 +67,7 @@ from .task_service import (
     get_tasks_created_by_user,
     get_tasks_assigned_to_others,
     bulk_delete_tasks,
+    bulk_soft_delete_tasks,
     bulk_soft_delete_with_undo,
     bulk_restore_tasks,
 )
@@ -94,14 +102,19 @@ __all__ = [
     "parse_vietnamese_time",
     # User service
     "get_or_create_user",
+    "enable_user_cache",
+    "invalidate_cached_user",
     "get_user_by_telegram_id",
     "get_user_by_id",
+    "get_users_by_ids",
     "get_user_by_username",
+    "get_users_by_handles",
     "find_users_by_mention",
     "update_user_settings",
     "get_or_create_group",
     "add_group_member",
     # Task service
+    "StaleTaskError",
     "generate_task_id",
     "create_task",
     "get_task_by_public_id",
@@ -117,10 +130,12 @@ __all__ = [
     "update_task_content",
     "update_task_deadline",
     "update_task_priority",
+    "update_priority_if_owner",
     "update_task_assignee",
     "soft_delete_task",
     "restore_task",
     "add_task_history",
+    "add_task_history_many",
     "create_default_reminders",
     "get_tasks_with_deadline",
     # Group task functions
@@ -135,6 +150,7 @@ __all__ = [
     "get_tasks_created_by_user",
     "get_tasks_assigned_to_others",
     "bulk_delete_tasks",
+    "bulk_soft_delete_tasks",
     "bulk_soft_delete_with_undo",
     "bulk_restore_tasks",
     # Recurring service
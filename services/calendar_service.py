@@ -19,6 +19,7 @@ from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from services.user_service import invalidate_cached_user
 from utils.security import encrypt_token, decrypt_token
 
 logger = logging.getLogger(__name__)
@@ -565,16 +566,19 @@ async def save_user_tokens(
         encrypted_access = encrypt_token(access_token) if access_token else None
         encrypted_refresh = encrypt_token(refresh_token) if refresh_token else None
 
-        await db.execute(
+        telegram_id = await db.fetch_val(
             """
             UPDATE users SET
                 google_calendar_token = $2,
                 google_calendar_refresh_token = $3,
                 updated_at = NOW()
             WHERE id = $1
+            RETURNING telegram_id
             """,
             user_id, encrypted_access, encrypted_refresh
         )
+        if telegram_id is not None:
+            invalidate_cached_user(telegram_id)
         return True
 
     except Exception as e:
@@ -594,16 +598,19 @@ async def disconnect_calendar(db, user_id: int) -> bool:
         True if disconnected successfully
     """
     try:
-        await db.execute(
+        telegram_id = await db.fetch_val(
             """
             UPDATE users SET
                 google_calendar_token = NULL,
                 google_calendar_refresh_token = NULL,
                 updated_at = NOW()
             WHERE id = $1
+            RETURNING telegram_id
             """,
             user_id
         )
+        if telegram_id is not None:
+            invalidate_cached_user(telegram_id)
         return True
 
     except Exception as e:
@@ -27,16 +27,7 @@ async def generate_recurring_id(db: Database) -> str:
     Returns:
         Recurring ID like R-0001
     """
-    result = await db.fetch_one(
-        """
-        UPDATE bot_config
-        SET value = (CAST(value AS INTEGER) + 1)::TEXT, updated_at = NOW()
-        WHERE key = 'recurring_id_counter'
-        RETURNING value
-        """
-    )
-
-    counter = int(result["value"]) if result else 1
+    counter = await db.fetch_val("SELECT nextval('recurring_id_seq')")
     return f"R-{counter:04d}"
 
 
@@ -121,7 +121,7 @@ async def get_pending_reminders(db: Database) -> List[Dict[str, Any]]:
     """
     reminders = await db.fetch_all(
         """
-        SELECT r.*,
+        SELECT r.id, r.task_id, r.user_id, r.remind_at, r.reminder_type, r.reminder_offset,
                t.content, t.public_id, t.status, t.priority, t.progress, t.deadline,
                u.telegram_id, u.display_name, u.reminder_source,
                u.remind_24h, u.remind_1h, u.remind_30m, u.remind_5m, u.remind_overdue,
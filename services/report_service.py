@@ -138,7 +138,7 @@ async def get_tasks_for_export(
         ORDER BY t.created_at DESC
     """
 
-    rows = await db.fetch_all(query, *params)
+    rows = await db.fetch_long(query, *params)
     return [dict(r) for r in rows]
 
 
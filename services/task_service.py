@@ -3,13 +3,14 @@ Task Service
 CRUD operations for tasks
 """
 
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 import pytz
 
-from database.connection import Database
+from asyncpg import Connection
+
+from database.connection import Database, get_db
 from services.task_validation import (
     ValidationError,
     validate_content,
@@ -34,6 +35,28 @@ logger = logging.getLogger(__name__)
 # Timezone
 TZ = pytz.timezone("Asia/Ho_Chi_Minh")
 
+# Runs on every task button press; prepared up front on each pool connection
+TASK_BY_PUBLIC_ID = """
+    SELECT t.*, u.display_name as assignee_name, c.display_name as creator_name,
+           u.username as assignee_username,
+           u.telegram_id as assignee_telegram_id, c.telegram_id as creator_telegram_id,
+           g.title as group_name
+    FROM tasks t
+    LEFT JOIN users u ON t.assignee_id = u.id
+    LEFT JOIN users c ON t.creator_id = c.id
+    LEFT JOIN groups g ON t.group_id = g.id
+    WHERE t.public_id = $1 AND t.is_deleted = false
+"""
+get_db().register_prepared("task_by_public_id", TASK_BY_PUBLIC_ID)
+
+
+class StaleTaskError(Exception):
+    """Raised when a task changed between being read and being updated."""
+
+    def __init__(self, public_id: str):
+        self.public_id = public_id
+        super().__init__(f"Task {public_id} was modified concurrently")
+
 
 async def generate_task_id(db: Database, prefix: str = "P") -> str:
     """
@@ -153,29 +176,23 @@ async def create_task(
     return dict(task)
 
 
-async def get_task_by_public_id(db: Database, public_id: str) -> Optional[Dict[str, Any]]:
+async def get_task_by_public_id(
+    db: Database,
+    public_id: str,
+    conn: Optional[Connection] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Get task by public ID (P-xxxx or G-xxxx).
 
     Args:
         db: Database connection
         public_id: Task public ID
+        conn: Connection from db.acquire() to reuse (pool if None)
 
     Returns:
         Task record or None
     """
-    task = await db.fetch_one(
-        """
-        SELECT t.*, u.display_name as assignee_name, c.display_name as creator_name,
-               g.title as group_name
-        FROM tasks t
-        LEFT JOIN users u ON t.assignee_id = u.id
-        LEFT JOIN users c ON t.creator_id = c.id
-        LEFT JOIN groups g ON t.group_id = g.id
-        WHERE t.public_id = $1 AND t.is_deleted = false
-        """,
-        public_id.upper()
-    )
+    task = await db.fetch_one_on(conn, TASK_BY_PUBLIC_ID, public_id.upper())
     return dict(task) if task else None
 
 
@@ -184,6 +201,8 @@ async def get_task_by_id(db: Database, task_id: int) -> Optional[Dict[str, Any]]
     task = await db.fetch_one(
         """
         SELECT t.*, u.display_name as assignee_name, c.display_name as creator_name,
+               u.username as assignee_username,
+               u.telegram_id as assignee_telegram_id, c.telegram_id as creator_telegram_id,
                g.title as group_name
         FROM tasks t
         LEFT JOIN users u ON t.assignee_id = u.id
@@ -233,12 +252,7 @@ async def get_user_tasks(
         LEFT JOIN users u ON t.creator_id = u.id
         WHERE {' AND '.join(conditions)}
         ORDER BY
-            CASE t.priority
-                WHEN 'urgent' THEN 1
-                WHEN 'high' THEN 2
-                WHEN 'normal' THEN 3
-                WHEN 'low' THEN 4
-            END,
+            t.priority DESC,
             t.deadline ASC NULLS LAST,
             t.created_at DESC
         LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
@@ -290,12 +304,7 @@ async def get_user_received_tasks(
         AND t.is_deleted = false
         {status_filter}
         ORDER BY
-            CASE t.priority
-                WHEN 'urgent' THEN 1
-                WHEN 'high' THEN 2
-                WHEN 'normal' THEN 3
-                WHEN 'low' THEN 4
-            END,
+            t.priority DESC,
             t.deadline ASC NULLS LAST,
             t.created_at DESC
         LIMIT $2 OFFSET $3
@@ -324,12 +333,7 @@ async def get_user_personal_tasks(
         AND t.is_deleted = false
         {status_filter}
         ORDER BY
-            CASE t.priority
-                WHEN 'urgent' THEN 1
-                WHEN 'high' THEN 2
-                WHEN 'normal' THEN 3
-                WHEN 'low' THEN 4
-            END,
+            t.priority DESC,
             t.deadline ASC NULLS LAST,
             t.created_at DESC
         LIMIT $2 OFFSET $3
@@ -374,12 +378,7 @@ async def get_all_user_related_tasks(
         {status_filter}
         {type_filter}
         ORDER BY
-            CASE t.priority
-                WHEN 'urgent' THEN 1
-                WHEN 'high' THEN 2
-                WHEN 'normal' THEN 3
-                WHEN 'low' THEN 4
-            END,
+            t.priority DESC,
             t.deadline ASC NULLS LAST,
             t.created_at DESC
         LIMIT $2 OFFSET $3
@@ -472,12 +471,18 @@ async def update_task_status(
             status = $2,
             progress = COALESCE($3, progress),
             completed_at = $4,
+            version = version + 1,
             updated_at = NOW()
-        WHERE id = $1
+        WHERE id = $1 AND version = $5 AND is_deleted = false
         RETURNING *
         """,
-        task_id, status, progress, completed_at
+        task_id, status, progress, completed_at, current["version"]
     )
+    if not task:
+        # Deleted since it was read: report not found, not "changed"
+        if not await _task_is_live(db, task_id):
+            return None
+        raise StaleTaskError(current["public_id"])
 
     # Log history
     await add_task_history(
@@ -529,6 +534,7 @@ async def update_task_status(
                             status = $2,
                             progress = $3,
                             completed_at = NOW(),
+                            version = version + 1,
                             updated_at = NOW()
                         WHERE id = $1
                         """,
@@ -541,6 +547,7 @@ async def update_task_status(
                             status = $2,
                             progress = $3,
                             completed_at = NULL,
+                            version = version + 1,
                             updated_at = NOW()
                         WHERE id = $1
                         """,
@@ -578,15 +585,25 @@ async def update_task_progress(
     return await update_task_status(db, task_id, status, user_id, progress)
 
 
+async def _task_is_live(db: Database, task_id: int) -> bool:
+    """Check whether a task still exists and is not soft-deleted."""
+    return await db.fetch_val(
+        "SELECT EXISTS (SELECT 1 FROM tasks WHERE id = $1 AND is_deleted = false)",
+        task_id
+    )
+
+
 async def update_task_content(
     db: Database,
     task_id: int,
     content: str,
     user_id: int,
+    current: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
-    """Update task content."""
-    current = await get_task_by_id(db, task_id)
-    if not current:
+    """Update task content; pass current to reuse an already loaded task row."""
+    if current is None:
+        current = await get_task_by_id(db, task_id)
+    if not current or current.get("is_deleted"):
         return None
 
     old_content = current["content"]
@@ -595,12 +612,18 @@ async def update_task_content(
         """
         UPDATE tasks SET
             content = $2,
+            version = version + 1,
             updated_at = NOW()
-        WHERE id = $1
+        WHERE id = $1 AND version = $3 AND is_deleted = false
         RETURNING *
         """,
-        task_id, content
+        task_id, content, current["version"]
     )
+    if not task:
+        # Deleted since it was read: report not found, not "changed"
+        if not await _task_is_live(db, task_id):
+            return None
+        raise StaleTaskError(current["public_id"])
 
     await add_task_history(
         db, task_id, user_id,
@@ -623,10 +646,12 @@ async def update_task_deadline(
     task_id: int,
     deadline: Optional[datetime],
     user_id: int,
+    current: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
-    """Update task deadline."""
-    current = await get_task_by_id(db, task_id)
-    if not current:
+    """Update task deadline; pass current to reuse an already loaded task row."""
+    if current is None:
+        current = await get_task_by_id(db, task_id)
+    if not current or current.get("is_deleted"):
         return None
 
     old_deadline = current.get("deadline")
@@ -635,12 +660,18 @@ async def update_task_deadline(
         """
         UPDATE tasks SET
             deadline = $2,
+            version = version + 1,
             updated_at = NOW()
-        WHERE id = $1
+        WHERE id = $1 AND version = $3 AND is_deleted = false
         RETURNING *
         """,
-        task_id, deadline
+        task_id, deadline, current["version"]
     )
+    if not task:
+        # Deleted since it was read: report not found, not "changed"
+        if not await _task_is_live(db, task_id):
+            return None
+        raise StaleTaskError(current["public_id"])
 
     await add_task_history(
         db, task_id, user_id,
@@ -663,10 +694,12 @@ async def update_task_priority(
     task_id: int,
     priority: str,
     user_id: int,
+    current: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
-    """Update task priority."""
-    current = await get_task_by_id(db, task_id)
-    if not current:
+    """Update task priority; pass current to reuse an already loaded task row."""
+    if current is None:
+        current = await get_task_by_id(db, task_id)
+    if not current or current.get("is_deleted"):
         return None
 
     old_priority = current.get("priority", "normal")
@@ -675,12 +708,18 @@ async def update_task_priority(
         """
         UPDATE tasks SET
             priority = $2,
+            version = version + 1,
             updated_at = NOW()
-        WHERE id = $1
+        WHERE id = $1 AND version = $3 AND is_deleted = false
         RETURNING *
         """,
-        task_id, priority
+        task_id, priority, current["version"]
     )
+    if not task:
+        # Deleted since it was read: report not found, not "changed"
+        if not await _task_is_live(db, task_id):
+            return None
+        raise StaleTaskError(current["public_id"])
 
     await add_task_history(
         db, task_id, user_id,
@@ -693,15 +732,68 @@ async def update_task_priority(
     return dict(task) if task else None
 
 
+async def update_priority_if_owner(
+    db: Database,
+    public_id: str,
+    priority: str,
+    user_id: int,
+) -> Optional[Dict[str, Any]]:
+    """
+    Set task priority in one statement if user_id created the task.
+
+    The ownership check and the update share a single UPDATE, so the
+    common case costs one round trip (plus the history insert).
+
+    Args:
+        db: Database connection
+        public_id: Task public ID
+        priority: New priority
+        user_id: User making the change (must be the creator)
+
+    Returns:
+        Updated task record, or None if the task is missing or not owned by user_id
+    """
+    task = await db.fetch_one(
+        """
+        UPDATE tasks t SET
+            priority = $2,
+            version = t.version + 1,
+            updated_at = NOW()
+        FROM (
+            SELECT id, priority FROM tasks
+            WHERE public_id = $1 AND creator_id = $3 AND is_deleted = false
+            FOR UPDATE
+        ) old
+        WHERE t.id = old.id
+        RETURNING t.*, old.priority AS old_priority
+        """,
+        public_id, priority, user_id
+    )
+    if not task:
+        return None
+
+    await add_task_history(
+        db, task["id"], user_id,
+        action="priority_changed",
+        field_name="priority",
+        old_value=task["old_priority"],
+        new_value=priority
+    )
+
+    return dict(task)
+
+
 async def update_task_assignee(
     db: Database,
     task_id: int,
     new_assignee_id: int,
     user_id: int,
+    current: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
-    """Update task assignee."""
-    current = await get_task_by_id(db, task_id)
-    if not current:
+    """Update task assignee; pass current to reuse an already loaded task row."""
+    if current is None:
+        current = await get_task_by_id(db, task_id)
+    if not current or current.get("is_deleted"):
         return None
 
     old_assignee_id = current.get("assignee_id")
@@ -724,12 +816,18 @@ async def update_task_assignee(
         """
         UPDATE tasks SET
             assignee_id = $2,
+            version = version + 1,
             updated_at = NOW()
-        WHERE id = $1
+        WHERE id = $1 AND version = $3 AND is_deleted = false
         RETURNING *
         """,
-        task_id, new_assignee_id
+        task_id, new_assignee_id, current["version"]
     )
+    if not task:
+        # Deleted since it was read: report not found, not "changed"
+        if not await _task_is_live(db, task_id):
+            return None
+        raise StaleTaskError(current["public_id"])
 
     await add_task_history(
         db, task_id, user_id,
@@ -746,6 +844,7 @@ async def soft_delete_task(
     db: Database,
     task_id: int,
     user_id: int,
+    current: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Soft delete task with 30-second undo window.
@@ -754,6 +853,7 @@ async def soft_delete_task(
         db: Database connection
         task_id: Task ID
         user_id: User deleting the task
+        current: Already loaded task row to reuse
 
     Returns:
         Undo record for restoring
@@ -761,23 +861,22 @@ async def soft_delete_task(
     Raises:
         PermissionError: If user cannot delete task
     """
-    task = await get_task_by_id(db, task_id)
+    task = current if current is not None else await get_task_by_id(db, task_id)
     if not task:
         return None
 
     # Check delete permission (only creator can delete)
     check_delete_permission(task, user_id)
 
-    # Store in undo buffer
+    # Store in undo buffer (the soft-deleted row itself is what gets restored)
     expires_at = datetime.now() + timedelta(seconds=30)
     undo = await db.fetch_one(
         """
-        INSERT INTO deleted_tasks_undo (task_id, task_data, deleted_by, expires_at)
-        VALUES ($1, $2, $3, $4)
+        INSERT INTO deleted_tasks_undo (task_id, deleted_by, expires_at)
+        VALUES ($1, $2, $3)
         RETURNING *
         """,
         task_id,
-        json.dumps(task, default=str),
         user_id,
         expires_at
     )
@@ -1003,6 +1102,58 @@ async def bulk_delete_tasks(
     return len(task_ids)
 
 
+async def bulk_soft_delete_tasks(
+    db: Database,
+    task_ids: List[int],
+    user_id: int,
+    note: str = "Task deleted",
+) -> int:
+    """
+    Soft delete tasks and their children with history and calendar cleanup.
+
+    Like soft_delete_task but without an undo record, and batched: one
+    UPDATE marks the tasks and their children, one INSERT logs history.
+
+    Args:
+        db: Database connection
+        task_ids: List of task IDs to delete
+        user_id: User performing deletion
+        note: History note for each deleted task
+
+    Returns:
+        Number of tasks deleted (children included)
+    """
+    if not task_ids:
+        return 0
+
+    rows = await db.fetch_all(
+        """
+        UPDATE tasks SET
+            is_deleted = true,
+            deleted_at = NOW(),
+            deleted_by = $2,
+            updated_at = NOW()
+        WHERE (id = ANY($1) OR parent_task_id = ANY($1)) AND is_deleted = false
+        RETURNING id, public_id, assignee_id, google_event_id
+        """,
+        task_ids, user_id
+    )
+    if not rows:
+        return 0
+
+    await add_task_history_many(db, [
+        (row["id"], user_id, "deleted", None, None, None, note)
+        for row in rows
+    ])
+
+    # Delete from Google Calendar where events exist
+    for row in rows:
+        if row["google_event_id"]:
+            await sync_task_to_calendar(db, dict(row), action="delete")
+
+    return len(rows)
+
+
 async def bulk_soft_delete_with_undo(
     db: Database,
     task_ids: List[int],
@@ -1024,29 +1175,25 @@ async def bulk_soft_delete_with_undo(
     if not task_ids:
         return None
 
-    # Get all tasks data for undo
-    tasks = await db.fetch_all(
-        "SELECT * FROM tasks WHERE id = ANY($1) AND is_deleted = false",
+    # Only tasks that are still live can be deleted (and later restored)
+    exists = await db.fetch_val(
+        "SELECT EXISTS (SELECT 1 FROM tasks WHERE id = ANY($1) AND is_deleted = false)",
         task_ids
     )
 
-    if not tasks:
+    if not exists:
         return None
 
-    # Store in undo buffer (store all task IDs and data)
+    # Store in undo buffer (task IDs only; rows are restored in place)
     expires_at = datetime.now() + timedelta(seconds=30)
     undo = await db.fetch_one(
         """
-        INSERT INTO deleted_tasks_undo (task_id, task_data, deleted_by, expires_at)
+        INSERT INTO deleted_tasks_undo (task_id, task_ids, deleted_by, expires_at)
         VALUES ($1, $2, $3, $4)
         RETURNING *
         """,
         task_ids[0],  # Store first task ID as reference
-        json.dumps({
-            "bulk": True,
-            "task_ids": task_ids,
-            "tasks": [dict(t) for t in tasks]
-        }, default=str),
+        task_ids,
         user_id,
         expires_at
     )
@@ -1103,16 +1250,8 @@ async def bulk_restore_tasks(db: Database, undo_id: int) -> int:
     if not undo:
         return 0
 
-    try:
-        task_data = json.loads(undo["task_data"])
-    except (json.JSONDecodeError, TypeError):
-        return 0
-
-    # Check if this is a bulk delete record
-    if not task_data.get("bulk"):
-        return 0
-
-    task_ids = task_data.get("task_ids", [])
+    # Only bulk delete records carry task_ids
+    task_ids = undo["task_ids"]
     if not task_ids:
         return 0
 
@@ -1171,6 +1310,21 @@ async def add_task_history(
     )
 
 
+HISTORY_COLUMNS = ["task_id", "user_id", "action", "field_name", "old_value", "new_value", "note"]
+
+
+async def add_task_history_many(db: Database, entries: List[tuple]) -> None:
+    """
+    Add several task history entries in one INSERT.
+
+    Args:
+        db: Database connection
+        entries: Tuples of (task_id, user_id, action, field_name,
+            old_value, new_value, note)
+    """
+    await db.insert_many("task_history", HISTORY_COLUMNS, entries)
+
+
 async def create_default_reminders(
     db: Database,
     task_id: int,
@@ -1189,46 +1343,29 @@ async def create_default_reminders(
         creator_id: Task creator (receives 1-min overdue reminder if different from assignee)
     """
     now = datetime.now(TZ)
+    rows = []
 
-    # Reminder 24h before for assignee
-    remind_24h = deadline - timedelta(hours=24)
-    if remind_24h > now:
-        await db.execute(
-            """
-            INSERT INTO reminders (task_id, user_id, remind_at, reminder_type, reminder_offset)
-            VALUES ($1, $2, $3, 'before_deadline', '24h')
-            ON CONFLICT DO NOTHING
-            """,
-            task_id, assignee_id, remind_24h
-        )
-
-    # Reminder 1h before for assignee
-    remind_1h = deadline - timedelta(hours=1)
-    if remind_1h > now:
-        await db.execute(
-            """
-            INSERT INTO reminders (task_id, user_id, remind_at, reminder_type, reminder_offset)
-            VALUES ($1, $2, $3, 'before_deadline', '1h')
-            ON CONFLICT DO NOTHING
-            """,
-            task_id, assignee_id, remind_1h
-        )
+    # Reminders 24h and 1h before for assignee
+    for offset_name, offset in (("24h", timedelta(hours=24)), ("1h", timedelta(hours=1))):
+        remind_at = deadline - offset
+        if remind_at > now:
+            rows.append((task_id, assignee_id, remind_at, "before_deadline", offset_name))
 
     # Reminder 1 minute after deadline for CREATOR (if different from assignee)
     # This notifies the creator when assigned task is overdue
     if creator_id and creator_id != assignee_id:
         remind_overdue_1m = deadline + timedelta(minutes=1)
         if remind_overdue_1m > now:
-            await db.execute(
-                """
-                INSERT INTO reminders (task_id, user_id, remind_at, reminder_type, reminder_offset)
-                VALUES ($1, $2, $3, 'creator_overdue', '1m')
-                ON CONFLICT DO NOTHING
-                """,
-                task_id, creator_id, remind_overdue_1m
-            )
+            rows.append((task_id, creator_id, remind_overdue_1m, "creator_overdue", "1m"))
             logger.info(f"Created 1-min overdue reminder for creator {creator_id} on task {task_id}")
 
+    # One multi-row INSERT instead of a round trip per reminder
+    await db.insert_many(
+        "reminders",
+        ["task_id", "user_id", "remind_at", "reminder_type", "reminder_offset"],
+        rows,
+    )
+
 
 async def get_tasks_with_deadline(
     db: Database,
@@ -1314,12 +1451,11 @@ async def create_group_task(
         group_id,
     )
 
-    # Log history for parent
-    await add_task_history(
-        db, parent["id"], creator_id,
-        action="created",
-        note=f"Group task created with {len(assignees)} assignees"
-    )
+    # History for parent and children is written in one batch at the end
+    history = [(
+        parent["id"], creator_id, "created", None, None, None,
+        f"Group task created with {len(assignees)} assignees",
+    )]
 
     # Create individual P-IDs for each assignee
     individual_tasks = []
@@ -1350,12 +1486,10 @@ async def create_group_task(
             group_id,
         )
 
-        # Log history
-        await add_task_history(
-            db, task["id"], creator_id,
-            action="created",
-            note=f"Individual task for {assignee.get('display_name', 'user')}"
-        )
+        history.append((
+            task["id"], creator_id, "created", None, None, None,
+            f"Individual task for {assignee.get('display_name', 'user')}",
+        ))
 
         # Create reminders
         if deadline:
@@ -1363,6 +1497,8 @@ async def create_group_task(
 
         individual_tasks.append((dict(task), assignee))
 
+    await add_task_history_many(db, history)
+
     logger.info(f"Created group task {group_task_id} with {len(assignees)} P-IDs")
     return dict(parent), individual_tasks
 
@@ -1370,6 +1506,7 @@ async def create_group_task(
 async def get_group_task_progress(
     db: Database,
     group_task_id: str,
+    conn: Optional[Connection] = None,
 ) -> Dict[str, Any]:
     """
     Get aggregated progress for group task.
@@ -1377,11 +1514,13 @@ async def get_group_task_progress(
     Args:
         db: Database connection
         group_task_id: Parent G-ID
+        conn: Connection from db.acquire() to reuse (pool if None)
 
     Returns:
         Dict with total, completed, progress, members, is_complete
     """
-    result = await db.fetch_one(
+    result = await db.fetch_one_on(
+        conn,
         """
         SELECT
             COUNT(*) as total,
@@ -1394,7 +1533,8 @@ async def get_group_task_progress(
     )
 
     # Get individual member status
-    members = await db.fetch_all(
+    members = await db.fetch_all_on(
+        conn,
         """
         SELECT t.public_id, t.status, t.progress, t.completed_at,
                u.display_name as assignee_name, u.telegram_id
@@ -1421,6 +1561,7 @@ async def get_group_task_progress(
 async def get_child_tasks(
     db: Database,
     group_task_id: str,
+    conn: Optional[Connection] = None,
 ) -> List[Dict[str, Any]]:
     """
     Get all child P-ID tasks under a G-ID.
@@ -1428,11 +1569,13 @@ async def get_child_tasks(
     Args:
         db: Database connection
         group_task_id: Parent G-ID
+        conn: Connection from db.acquire() to reuse (pool if None)
 
     Returns:
         List of child task records
     """
-    tasks = await db.fetch_all(
+    tasks = await db.fetch_all_on(
+        conn,
         """
         SELECT t.*, u.display_name as assignee_name, u.username as assignee_username, u.telegram_id
         FROM tasks t
@@ -1518,8 +1661,8 @@ async def check_and_complete_group_task(
     return None
 
 
-async def is_group_task(db: Database, public_id: str) -> bool:
-    """Check if task is a group task (G-ID or GXXXX)."""
+def is_group_task(public_id: str) -> bool:
+    """Check if task is a group task (G-ID or GXXXX) from its ID alone; no query needed."""
     upper_id = public_id.upper()
     # Check G- prefix or G followed by digits (G0041, G-0041, etc.)
     if upper_id.startswith("G-"):
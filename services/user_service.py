@@ -8,10 +8,94 @@ from typing import Any, Dict, List, Optional
 
 from telegram import User as TelegramUser
 
-from database.connection import Database
+from database.connection import Database, get_db
 
 logger = logging.getLogger(__name__)
 
+# Runs on every update; prepared up front on each pool connection
+USER_BY_TELEGRAM_ID = "SELECT * FROM users WHERE telegram_id = $1"
+get_db().register_prepared("user_by_telegram_id", USER_BY_TELEGRAM_ID)
+
+# Per-process cache of users rows keyed by telegram_id, for the lookup
+# every handler makes. Only used while the user_changed LISTEN connection
+# is up: a trigger on users NOTIFYs on every UPDATE/DELETE, whichever
+# module or process wrote it.
+USER_CACHE_MAX = 10000
+_user_cache: Dict[int, Dict[str, Any]] = {}
+_user_cache_enabled = False
+# Bumped on every invalidation. A reader notes it before its SELECT and
+# only caches the row if no invalidation arrived while the query was in
+# flight; otherwise it could store a row the NOTIFY already superseded.
+_user_cache_generation = 0
+
+
+def _bump_user_cache_generation() -> None:
+    """Mark every row read before now as possibly stale."""
+    global _user_cache_generation
+    _user_cache_generation += 1
+
+
+def invalidate_cached_user(telegram_id: Optional[int] = None) -> None:
+    """
+    Drop a cached user right after writing it in this process.
+
+    NOTIFY arrives asynchronously; this makes the writer's own next read
+    fresh. Without telegram_id the whole cache is cleared.
+    """
+    _bump_user_cache_generation()
+    if telegram_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(telegram_id, None)
+
+
+def _invalidate_cached_user(payload: str) -> None:
+    """Drop one cached user on NOTIFY user_changed."""
+    _bump_user_cache_generation()
+    try:
+        _user_cache.pop(int(payload), None)
+    except ValueError:
+        _user_cache.clear()
+
+
+def _disable_user_cache() -> None:
+    """Stop caching once invalidations can no longer be received."""
+    global _user_cache_enabled
+    _user_cache_enabled = False
+    _bump_user_cache_generation()
+    _user_cache.clear()
+    logger.warning("user_changed listener lost, user cache disabled")
+
+
+def _cache_user(user: Dict[str, Any], generation: int) -> None:
+    """Remember a users row read at generation, unless invalidated since."""
+    if not _user_cache_enabled or generation != _user_cache_generation:
+        return
+    if len(_user_cache) >= USER_CACHE_MAX:
+        _user_cache.clear()
+    _user_cache[user["telegram_id"]] = user
+
+
+async def enable_user_cache(db: Database) -> bool:
+    """
+    Start caching users rows, invalidated via LISTEN user_changed.
+
+    Args:
+        db: Database connection
+
+    Returns:
+        True if the cache is active
+    """
+    global _user_cache_enabled
+    try:
+        await db.listen("user_changed", _invalidate_cached_user, _disable_user_cache)
+    except Exception as e:
+        logger.warning(f"User cache disabled, LISTEN failed: {e}")
+        return False
+    _user_cache.clear()
+    _user_cache_enabled = True
+    return True
+
 
 async def get_or_create_user(db: Database, tg_user: TelegramUser) -> Dict[str, Any]:
     """
@@ -24,11 +108,19 @@ async def get_or_create_user(db: Database, tg_user: TelegramUser) -> Dict[str, A
     Returns:
         User record as dict
     """
+    cached = _user_cache.get(tg_user.id) if _user_cache_enabled else None
+    if (
+        cached is not None
+        and cached["username"] == tg_user.username
+        and cached["first_name"] == tg_user.first_name
+        and cached["last_name"] == tg_user.last_name
+    ):
+        return dict(cached)
+
+    generation = _user_cache_generation
+
     # Try to find existing user
-    user = await db.fetch_one(
-        "SELECT * FROM users WHERE telegram_id = $1",
-        tg_user.id
-    )
+    user = await db.fetch_one(USER_BY_TELEGRAM_ID, tg_user.id)
 
     if user:
         # Update user info if changed
@@ -54,11 +146,10 @@ async def get_or_create_user(db: Database, tg_user: TelegramUser) -> Dict[str, A
                 tg_user.last_name,
                 display_name,
             )
-            # Refresh user data
-            user = await db.fetch_one(
-                "SELECT * FROM users WHERE telegram_id = $1",
-                tg_user.id
-            )
+            # Refresh user data (written after our UPDATE, so re-note the generation)
+            generation = _user_cache_generation
+            user = await db.fetch_one(USER_BY_TELEGRAM_ID, tg_user.id)
+        _cache_user(dict(user), generation)
         return dict(user)
 
     # Create new user
@@ -77,6 +168,7 @@ async def get_or_create_user(db: Database, tg_user: TelegramUser) -> Dict[str, A
     )
 
     logger.info(f"Created new user: {tg_user.id} ({display_name})")
+    _cache_user(dict(user), generation)
     return dict(user)
 
 
@@ -116,6 +208,27 @@ async def get_user_by_id(db: Database, user_id: int) -> Optional[Dict[str, Any]]
     return dict(user) if user else None
 
 
+async def get_users_by_ids(db: Database, user_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Get several users by internal ID in one query.
+
+    Args:
+        db: Database connection
+        user_ids: Internal user IDs
+
+    Returns:
+        Active users, in the order of user_ids (missing IDs skipped)
+    """
+    if not user_ids:
+        return []
+    rows = await db.fetch_all(
+        "SELECT * FROM users WHERE id = ANY($1::int[]) AND is_active = true",
+        list(user_ids)
+    )
+    by_id = {r["id"]: dict(r) for r in rows}
+    return [by_id[uid] for uid in user_ids if uid in by_id]
+
+
 async def get_user_by_username(db: Database, username: str) -> Optional[Dict[str, Any]]:
     """
     Get user by Telegram username.
@@ -137,6 +250,44 @@ async def get_user_by_username(db: Database, username: str) -> Optional[Dict[str
     return dict(user) if user else None
 
 
+async def get_users_by_handles(db: Database, handles: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve several usernames / Telegram IDs in one query.
+
+    A numeric handle matches a Telegram ID first, then a username; any
+    other handle matches a username case-insensitively.
+
+    Args:
+        db: Database connection
+        handles: Usernames (without @) or numeric Telegram IDs
+
+    Returns:
+        Mapping of each resolved handle to its user record (unresolved handles omitted)
+    """
+    if not handles:
+        return {}
+    telegram_ids = [int(h) for h in handles if h.isascii() and h.isdigit()]
+    rows = await db.fetch_all(
+        "SELECT * FROM users WHERE LOWER(username) = ANY($1::text[]) OR telegram_id = ANY($2::bigint[])",
+        [h.lower() for h in handles],
+        telegram_ids,
+    )
+    users = [dict(r) for r in rows]
+    by_telegram_id = {u["telegram_id"]: u for u in users}
+    by_username = {u["username"].lower(): u for u in users if u["username"]}
+
+    found = {}
+    for handle in handles:
+        user = None
+        if handle.isascii() and handle.isdigit():
+            user = by_telegram_id.get(int(handle))
+        if user is None:
+            user = by_username.get(handle.lower())
+        if user is not None:
+            found[handle] = user
+    return found
+
+
 async def find_users_by_mention(
     db: Database,
     group_telegram_id: int,
@@ -233,6 +384,8 @@ async def update_user_settings(
         """,
         *values
     )
+    if user:
+        invalidate_cached_user(user["telegram_id"])
 
     return dict(user) if user else None
 
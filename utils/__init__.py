@@ -31,6 +31,13 @@ from .messages import (
     MSG_REMINDER_24H,
     MSG_REMINDER_1H,
     MSG_REMINDER_OVERDUE,
+    # Edit prompts
+    MSG_EDIT_MENU,
+    MSG_EDIT_CONTENT_PROMPT,
+    MSG_EDIT_DEADLINE_PROMPT,
+    MSG_EDIT_PRIORITY_MENU,
+    MSG_EDIT_GROUP_ASSIGNEE_PROMPT,
+    MSG_EDIT_ASSIGNEE_PROMPT,
     # Error messages
     ERR_NO_PERMISSION,
     ERR_NOT_FOUND,
@@ -43,6 +50,7 @@ from .messages import (
     ERR_PRIVATE_ONLY,
     ERR_UNDO_EXPIRED,
     ERR_ALREADY_COMPLETED,
+    ERR_TASK_CHANGED,
     ERR_DATABASE,
     # Labels
     STATUS_PENDING,
@@ -140,6 +148,12 @@ __all__ = [
     "MSG_REMINDER_24H",
     "MSG_REMINDER_1H",
     "MSG_REMINDER_OVERDUE",
+    "MSG_EDIT_MENU",
+    "MSG_EDIT_CONTENT_PROMPT",
+    "MSG_EDIT_DEADLINE_PROMPT",
+    "MSG_EDIT_PRIORITY_MENU",
+    "MSG_EDIT_GROUP_ASSIGNEE_PROMPT",
+    "MSG_EDIT_ASSIGNEE_PROMPT",
     "ERR_NO_PERMISSION",
     "ERR_NOT_FOUND",
     "ERR_TASK_NOT_FOUND",
@@ -151,6 +165,7 @@ __all__ = [
     "ERR_PRIVATE_ONLY",
     "ERR_UNDO_EXPIRED",
     "ERR_ALREADY_COMPLETED",
+    "ERR_TASK_CHANGED",
     "ERR_DATABASE",
     "STATUS_PENDING",
     "STATUS_IN_PROGRESS",
@@ -255,6 +255,57 @@ MSG_REMINDER_OVERDUE = """
 Vui lòng cập nhật trạng thái.
 """
 
+# Edit prompts (reply-based edits share the same footer)
+_EDIT_REPLY_HINT = "⚠️ REPLY tin nhắn này khi nhập (vuốt phải)\n"
+_EDIT_CANCEL_HINT = "(Gửi /huy để hủy)"
+
+MSG_EDIT_MENU = (
+    "✏️ <b>SỬA VIỆC {task_id}</b>\n\n"
+    "📝 <b>Nội dung:</b> {content}\n"
+    "📅 <b>Deadline:</b> {deadline}\n"
+    "🔔 <b>Độ ưu tiên:</b> {priority}\n\n"
+    "Chọn mục cần sửa:"
+)
+
+MSG_EDIT_CONTENT_PROMPT = (
+    "📝 SỬA NỘI DUNG {task_id}\n\n"
+    "Nội dung hiện tại:\n{content}\n\n"
+    "Hãy gửi nội dung mới cho việc này.\n"
+    + _EDIT_REPLY_HINT + _EDIT_CANCEL_HINT
+)
+
+MSG_EDIT_DEADLINE_PROMPT = (
+    "📅 SỬA DEADLINE {task_id}\n\n"
+    "Deadline hiện tại: {deadline}\n\n"
+    "Hãy gửi deadline mới.\n"
+    "Ví dụ: ngày mai 9h, thứ 6, 25/12, cuối tuần\n\n"
+    + _EDIT_REPLY_HINT + "(Gửi /huy để hủy, gửi 'xóa' để xóa deadline)"
+)
+
+MSG_EDIT_PRIORITY_MENU = (
+    "🔔 SỬA ĐỘ ƯU TIÊN {task_id}\n\n"
+    "Độ ưu tiên hiện tại: {priority}\n\n"
+    "Chọn độ ưu tiên mới:"
+)
+
+MSG_EDIT_GROUP_ASSIGNEE_PROMPT = (
+    "👥 SỬA NGƯỜI NHẬN VIỆC NHÓM {task_id}\n\n"
+    "Người nhận hiện tại:\n{assignees}\n\n"
+    "📝 Nhập danh sách người nhận mới (cách nhau bằng dấu phẩy):\n"
+    "Ví dụ: @user1, @user2, @user3\n\n"
+    "💡 Nhập 1 người để chuyển thành việc cá nhân\n"
+    + _EDIT_REPLY_HINT + _EDIT_CANCEL_HINT
+)
+
+MSG_EDIT_ASSIGNEE_PROMPT = (
+    "👤 SỬA NGƯỜI NHẬN {task_id}\n\n"
+    "Người nhận hiện tại: {assignee}\n\n"
+    "📝 Nhập người nhận mới:\n"
+    "• 1 người: @username → việc cá nhân\n"
+    "• Nhiều người: @user1, @user2 → việc nhóm\n\n"
+    + _EDIT_REPLY_HINT + _EDIT_CANCEL_HINT
+)
+
 # Error messages
 ERR_NO_PERMISSION = "Bạn không có quyền thực hiện thao tác này."
 ERR_NOT_FOUND = "Không tìm thấy mục được yêu cầu."
@@ -267,6 +318,7 @@ ERR_GROUP_ONLY = "Lệnh này chỉ hoạt động trong nhóm."
 ERR_PRIVATE_ONLY = "Lệnh này chỉ hoạt động trong chat riêng."
 ERR_UNDO_EXPIRED = "Hết thời gian hoàn tác."
 ERR_ALREADY_COMPLETED = "Việc {task_id} đã hoàn thành rồi."
+ERR_TASK_CHANGED = "Việc {task_id} vừa được người khác cập nhật. Vui lòng mở lại và thử lại."
 ERR_DATABASE = "Lỗi hệ thống. Vui lòng thử lại sau."
 
 # Status labels
@@ -6,6 +6,18 @@ Validate user input for task management
 import re
 from typing import List, Optional, Tuple
 
+# Patterns compiled once at import; these run on every task message
+MENTION_PATTERN = re.compile(r"@(\w+)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+PUBLIC_ID_PATTERN = re.compile(r"^[PG]-\d{4}$")
+
+# Priority keywords, checked in order
+PRIORITY_PATTERNS = [
+    (re.compile(r"\b(khan\s*cap|kc)\b", re.IGNORECASE), "urgent"),
+    (re.compile(r"\b(uu\s*tien\s*cao|cao)\b", re.IGNORECASE), "high"),
+    (re.compile(r"\b(uu\s*tien\s*thap|thap)\b", re.IGNORECASE), "low"),
+]
+
 
 def extract_mentions(text: str) -> Tuple[List[str], str]:
     """
@@ -17,9 +29,9 @@ def extract_mentions(text: str) -> Tuple[List[str], str]:
     Returns:
         Tuple of (list of usernames without @, remaining text)
     """
-    mentions = re.findall(r"@(\w+)", text)
-    remaining = re.sub(r"@\w+", "", text).strip()
-    remaining = re.sub(r"\s+", " ", remaining)  # Normalize whitespace
+    mentions = MENTION_PATTERN.findall(text)
+    remaining = MENTION_PATTERN.sub("", text).strip()
+    remaining = WHITESPACE_PATTERN.sub(" ", remaining)  # Normalize whitespace
     return mentions, remaining
 
 
@@ -164,16 +176,10 @@ def parse_task_command(text: str) -> dict:
     result["mentions"] = mentions
 
     # Check for priority keywords
-    priority_patterns = [
-        (r"\b(khan\s*cap|kc)\b", "urgent"),
-        (r"\b(uu\s*tien\s*cao|cao)\b", "high"),
-        (r"\b(uu\s*tien\s*thap|thap)\b", "low"),
-    ]
-
-    for pattern, priority in priority_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
+    for pattern, priority in PRIORITY_PATTERNS:
+        if pattern.search(text):
             result["priority"] = priority
-            text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+            text = pattern.sub("", text)
             break
 
     result["content"] = text.strip()
@@ -192,8 +198,7 @@ def is_valid_public_id(public_id: str) -> bool:
     Returns:
         True if valid format
     """
-    pattern = r"^[PG]-\d{4}$"
-    return bool(re.match(pattern, public_id.upper()))
+    return bool(PUBLIC_ID_PATTERN.match(public_id.upper()))
 
 
 # NOTE: sanitize_html was removed - use escape_html from utils.formatters instead